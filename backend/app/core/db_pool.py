@@ -0,0 +1,125 @@
+"""
+Instrumented asyncpg pool - acquire wait times, connections in use and queries per caller.
+
+InstrumentedPool wraps asyncpg.Pool with the same interface the repositories
+use (fetch/fetchrow/fetchval/execute/executemany, ``async with pool.acquire()``
+and ``await pool.acquire()`` / ``pool.release()``). Connections handed out are
+proxies that count their queries. Every query is attributed to the function
+that issued it (e.g. ``price_repository.get_historical_data_bulk``), so
+``rate(db_queries_total[1m])`` gives queries per second per repository function.
+"""
+import sys
+import time
+
+import asyncpg
+
+from app.core.metrics import registry
+
+ACQUIRE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_QUERY_METHODS = frozenset(
+    {"execute", "executemany", "fetch", "fetchrow", "fetchval", "copy_records_to_table", "copy_to_table"}
+)
+
+acquire_wait = registry.histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection", buckets=ACQUIRE_BUCKETS
+)
+connections_in_use = registry.gauge("db_pool_connections_in_use", "Pooled connections currently acquired")
+pool_size = registry.gauge("db_pool_size", "Open connections in the pool")
+queries_total = registry.counter("db_queries_total", "Queries issued, by calling function", ("caller",))
+
+
+def _caller() -> str:
+    """``module.function`` of the nearest frame outside this module."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return f"{frame.f_globals.get('__name__', '').rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+
+
+class _Connection:
+    """Proxy of a pooled connection that counts queries against the acquiring caller."""
+
+    def __init__(self, connection: asyncpg.Connection, caller: str):
+        self._connection = connection
+        self._caller = caller
+
+    def __getattr__(self, name):
+        attribute = getattr(self._connection, name)
+        if name in _QUERY_METHODS:
+            queries_total.inc(caller=self._caller)
+        return attribute
+
+
+class _Acquire:
+    """Awaitable and async context manager, like asyncpg's PoolAcquireContext."""
+
+    def __init__(self, pool: "InstrumentedPool", timeout: float | None, caller: str):
+        self._pool = pool
+        self._timeout = timeout
+        self._caller = caller
+        self._connection: _Connection | None = None
+
+    async def _acquire(self) -> _Connection:
+        started = time.perf_counter()
+        connection = await self._pool._pool.acquire(timeout=self._timeout)
+        acquire_wait.observe(time.perf_counter() - started)
+        connections_in_use.inc()
+        pool_size.set(self._pool._pool.get_size())
+        return _Connection(connection, self._caller)
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self) -> _Connection:
+        self._connection = await self._acquire()
+        return self._connection
+
+    async def __aexit__(self, *exc):
+        await self._pool.release(self._connection)
+
+
+class InstrumentedPool:
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        # close(), get_size(), get_idle_size(), ... go straight to the pool
+        return getattr(self._pool, name)
+
+    def acquire(self, *, timeout: float | None = None) -> _Acquire:
+        return _Acquire(self, timeout, _caller())
+
+    async def release(self, connection: _Connection, *, timeout: float | None = None):
+        connections_in_use.dec()
+        await self._pool.release(connection._connection, timeout=timeout)
+
+    async def _query(self, method: str, caller: str, *args, **kwargs):
+        async with _Acquire(self, None, caller) as connection:
+            return await getattr(connection, method)(*args, **kwargs)
+
+    async def execute(self, query: str, *args, timeout: float | None = None):
+        return await self._query("execute", _caller(), query, *args, timeout=timeout)
+
+    async def executemany(self, command: str, args, *, timeout: float | None = None):
+        return await self._query("executemany", _caller(), command, args, timeout=timeout)
+
+    async def fetch(self, query: str, *args, timeout: float | None = None):
+        return await self._query("fetch", _caller(), query, *args, timeout=timeout)
+
+    async def fetchrow(self, query: str, *args, timeout: float | None = None):
+        return await self._query("fetchrow", _caller(), query, *args, timeout=timeout)
+
+    async def fetchval(self, query: str, *args, column: int = 0, timeout: float | None = None):
+        return await self._query("fetchval", _caller(), query, *args, column=column, timeout=timeout)
+
+    def snapshot(self) -> dict:
+        size = self._pool.get_size()
+        return {
+            "size": size,
+            "idle": self._pool.get_idle_size(),
+            "in_use": size - self._pool.get_idle_size(),
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+        }
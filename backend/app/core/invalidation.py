@@ -0,0 +1,138 @@
+"""
+Invalidation bus - cross-process cache eviction over Postgres LISTEN/NOTIFY.
+
+Writers call ``await bus.publish(pool, topic, key)`` after changing shared
+state. Subscribers of that topic run at once in the writing process and, via a
+NOTIFY on CHANNEL, in every other worker. Each process keeps one dedicated
+LISTEN connection and reconnects when it drops; after a reconnect every topic
+is reset (key None), since notifications may have been missed meanwhile.
+
+Topics:
+  token              - api_tokens changed
+  stocks             - stocks table repopulated
+  daily_prices       - stored daily candles changed (key: symbol)
+  screening_snapshot - a new screening snapshot was published (data: version, run_key)
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import defaultdict
+
+import asyncpg
+
+from app.config import settings
+
+CHANNEL = "app_invalidation"
+RECONNECT_SECONDS = 5
+
+
+class InvalidationBus:
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self._subscribers: dict[str, list] = defaultdict(list)
+        self._origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, topic: str, callback):
+        """Run ``callback(key, data)`` for every event on ``topic``; key None means everything."""
+        self._subscribers[topic].append(callback)
+
+    def _dispatch(self, topic: str, key, data):
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                callback(key, data)
+            except Exception:
+                pass
+
+    async def publish(self, pool: asyncpg.Pool, topic: str, key: str | None = None, data=None):
+        """Evict locally, then notify the other processes."""
+        self._dispatch(topic, key, data)
+        payload = json.dumps({"topic": topic, "key": key, "data": data, "origin": self._origin})
+        try:
+            await pool.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception:
+            pass
+
+    def _notified(self, conn, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == self._origin:
+            return  # Already dispatched when published
+        self._dispatch(message.get("topic"), message.get("key"), message.get("data"))
+
+    async def _listen(self):
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(settings.DATABASE_URL)
+                await conn.add_listener(self.channel, self._notified)
+                if connected_before:
+                    for topic in list(self._subscribers):
+                        self._dispatch(topic, None, None)
+                connected_before = True
+                while not conn.is_closed():
+                    await asyncio.sleep(RECONNECT_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+bus = InvalidationBus()
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Process-local cache whose entries are evicted by bus events on ``topic``."""
+
+    def __init__(self, topic: str, invalidation_bus: InvalidationBus = bus):
+        self._data: dict = {}
+        # Bumped on every eviction so loads that started before it are not stored
+        self._generation = 0
+        invalidation_bus.subscribe(topic, self._evict)
+
+    def _evict(self, key, data=None):
+        self._generation += 1
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    async def get_or_load(self, key, loader, cache_if=lambda value: True):
+        """Cached value for ``key``, else ``await loader()`` (stored when ``cache_if(value)``)."""
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = self._generation
+        value = await loader()
+        if generation == self._generation and cache_if(value):
+            self._data[key] = value
+        return value
+
+    def clear(self):
+        self._evict(None)
@@ -0,0 +1,59 @@
+import asyncio
+
+# Sampling period for event-loop lag measurement (seconds)
+LAG_SAMPLE_INTERVAL = 0.1
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic sleeper.
+
+    Lag is the difference between the scheduled and the actual wake-up time, so
+    any coroutine hogging the loop (CPU-bound work, blocking calls) shows up here.
+    """
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.samples = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.last_ms = lag_ms
+            self.max_ms = max(self.max_ms, lag_ms)
+            self.total_ms += lag_ms
+            self.samples += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self):
+        self.last_ms = self.max_ms = self.total_ms = 0.0
+        self.samples = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "last_ms": round(self.last_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "avg_ms": round(self.total_ms / self.samples, 2) if self.samples else 0.0,
+            "samples": self.samples,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
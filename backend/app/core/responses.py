@@ -0,0 +1,76 @@
+"""
+Content negotiation for bulk endpoints.
+
+Clients sending ``Accept: application/msgpack`` receive MessagePack instead of
+JSON. Candle and indicator series (lists of row dicts) are transposed into
+columns (``{"date": [...], "close": [...], ...}``) so repeated keys are sent
+once per series instead of once per row.
+"""
+import json
+
+import msgpack
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# Payload keys holding row-oriented series that are sent column-oriented in msgpack
+SERIES_KEYS = ("data", "indicators", "raw_data", "macd_hist_values")
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "").lower()
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def to_columns(rows: list[dict]) -> dict[str, list]:
+    """Transpose a list of row dicts into a dict of column lists."""
+    if not rows:
+        return {}
+    columns = {key: [] for key in rows[0]}
+    for row in rows:
+        for key, values in columns.items():
+            values.append(row.get(key))
+    return columns
+
+
+def _columnarize(value):
+    if isinstance(value, dict):
+        return {
+            k: to_columns(v)
+            if k in SERIES_KEYS and isinstance(v, list) and v and isinstance(v[0], dict)
+            else _columnarize(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_columnarize(v) for v in value]
+    return value
+
+
+def _dumps_json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiated_response(request: Request, payload) -> Response:
+    """Return ``payload`` as MessagePack or JSON depending on the Accept header.
+
+    Payloads made only of dicts, lists, strings and numbers (screening results)
+    are serialized directly; jsonable_encoder is only used when that fails, as
+    walking a full screening response with it takes seconds.
+    """
+    if wants_msgpack(request):
+        try:
+            body = msgpack.packb(_columnarize(payload), use_bin_type=True)
+        except TypeError:
+            body = msgpack.packb(_columnarize(jsonable_encoder(payload)), use_bin_type=True)
+        return Response(
+            content=body,
+            media_type="application/msgpack",
+            headers={"X-Series-Layout": "columnar", "Vary": "Accept"},
+        )
+    try:
+        body = _dumps_json(payload)
+    except TypeError:
+        body = _dumps_json(jsonable_encoder(payload))
+    return Response(content=body, media_type="application/json", headers={"Vary": "Accept"})
@@ -1,14 +1,30 @@
+import hashlib
+import json
+
 import asyncpg
 from app.config import settings
+from app.core.db_pool import InstrumentedPool
+from app.core.invalidation import bus
+
+# app_metadata key holding the hash of the last universe written to stocks
+STOCKS_HASH_KEY = "stocks_hash"
 
-_pool: asyncpg.Pool | None = None
+_pool: InstrumentedPool | None = None
 
 
-async def get_pool() -> asyncpg.Pool:
-    """Get the shared connection pool."""
+async def get_pool() -> InstrumentedPool:
+    """Get the shared connection pool (sized by the DB_* settings)."""
     global _pool
     if _pool is None:
-        _pool = await asyncpg.create_pool(settings.DATABASE_URL, min_size=2, max_size=10)
+        _pool = InstrumentedPool(
+            await asyncpg.create_pool(
+                settings.DATABASE_URL,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+                command_timeout=settings.DB_COMMAND_TIMEOUT or None,
+            )
+        )
     return _pool
 
 
@@ -28,7 +44,7 @@ async def init_db():
             CREATE TABLE IF NOT EXISTS daily_prices (
                 id SERIAL PRIMARY KEY,
                 symbol TEXT,
-                date TEXT,
+                date DATE,
                 open DOUBLE PRECISION,
                 high DOUBLE PRECISION,
                 low DOUBLE PRECISION,
@@ -36,6 +52,37 @@ async def init_db():
                 volume BIGINT,
                 UNIQUE(symbol, date)
             )""")
+        # Older databases stored daily_prices.date as 'YYYY-MM-DD' text
+        date_type = await conn.fetchval(
+            """SELECT data_type FROM information_schema.columns
+               WHERE table_name = 'daily_prices' AND column_name = 'date'"""
+        )
+        if date_type == "text":
+            await conn.execute("ALTER TABLE daily_prices ALTER COLUMN date TYPE DATE USING date::date")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_price_blocks (
+                symbol TEXT NOT NULL,
+                period DATE NOT NULL,
+                date DATE[] NOT NULL,
+                open DOUBLE PRECISION[] NOT NULL,
+                high DOUBLE PRECISION[] NOT NULL,
+                low DOUBLE PRECISION[] NOT NULL,
+                close DOUBLE PRECISION[] NOT NULL,
+                volume BIGINT[] NOT NULL,
+                PRIMARY KEY (symbol, period)
+            )""")
+        # One partition per IST trading day (see intraday_store)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS intraday_prices (
+                symbol TEXT NOT NULL,
+                ts TIMESTAMPTZ NOT NULL,
+                open DOUBLE PRECISION,
+                high DOUBLE PRECISION,
+                low DOUBLE PRECISION,
+                close DOUBLE PRECISION,
+                volume BIGINT,
+                PRIMARY KEY (symbol, ts)
+            ) PARTITION BY RANGE (ts)""")
         await conn.execute("""
             CREATE TABLE IF NOT EXISTS api_tokens (
                 id SERIAL PRIMARY KEY,
@@ -44,8 +91,56 @@ async def init_db():
                 expires_at TEXT,
                 created_at TEXT
             )""")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS app_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TIMESTAMPTZ
+            )""")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS signal_events (
+                id BIGSERIAL PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                previous_trend TEXT NOT NULL,
+                trend TEXT NOT NULL,
+                price DOUBLE PRECISION,
+                macd_hist DOUBLE PRECISION,
+                mode TEXT,
+                run_id INTEGER,
+                occurred_at TIMESTAMPTZ NOT NULL
+            )""")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS screening_snapshots (
+                name TEXT PRIMARY KEY,
+                mode TEXT,
+                encoding TEXT NOT NULL,
+                payload BYTEA NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL
+            )""")
+        await conn.execute("""
+            ALTER TABLE screening_snapshots
+                ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS run_key TEXT""")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS screening_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                state JSONB NOT NULL,
+                encoding TEXT,
+                result BYTEA,
+                updated_at TIMESTAMPTZ NOT NULL
+            )""")
+        # Covering index: latest-N-rows lookups per symbol are index-only scans
+        await conn.execute("DROP INDEX IF EXISTS idx_daily_prices_symbol_date")
+        await conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_daily_prices_symbol_date_desc
+               ON daily_prices(symbol, date DESC) INCLUDE (open, high, low, close, volume)"""
+        )
         await conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_daily_prices_symbol_date ON daily_prices(symbol, date)"
+            "CREATE INDEX IF NOT EXISTS idx_signal_events_trend_time ON signal_events(trend, occurred_at DESC)"
+        )
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_signal_events_symbol_time ON signal_events(symbol, occurred_at DESC)"
         )
 
 
@@ -57,24 +152,62 @@ async def close_db():
         _pool = None
 
 
-async def populate_stocks(stock_list: list[dict]):
-    """Insert/update all stocks from STOCK_LIST."""
+def stock_list_hash(stock_list: list[dict]) -> str:
+    """Content hash of the universe as stored in the stocks table."""
+    content = sorted(
+        (stock["symbol"], stock["name"], stock["isin"], bool(stock["has_options"])) for stock in stock_list
+    )
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+async def populate_stocks(stock_list: list[dict], force: bool = False) -> bool:
+    """Insert/update all stocks from STOCK_LIST in one statement; True if anything was written.
+
+    Skipped when the universe's content hash matches the one stored in
+    app_metadata (unless ``force``). Rows whose content is unchanged keep
+    their last_updated.
+    """
     from datetime import datetime
 
+    digest = stock_list_hash(stock_list)
     pool = await get_pool()
     async with pool.acquire() as conn:
-        for stock in stock_list:
-            await conn.execute(
+        if not force and await conn.fetchval(
+            "SELECT value FROM app_metadata WHERE key = $1", STOCKS_HASH_KEY
+        ) == digest:
+            return False
+        async with conn.transaction():
+            # Workers booting together write once; the others find the hash already stored
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", STOCKS_HASH_KEY)
+            if not force and await conn.fetchval(
+                "SELECT value FROM app_metadata WHERE key = $1", STOCKS_HASH_KEY
+            ) == digest:
+                return False
+            status = await conn.execute(
                 """INSERT INTO stocks (symbol, name, isin, has_options, last_updated)
-                   VALUES ($1, $2, $3, $4, $5)
+                   SELECT symbol, name, isin, has_options, $5
+                   FROM unnest($1::text[], $2::text[], $3::text[], $4::boolean[])
+                     AS s(symbol, name, isin, has_options)
                    ON CONFLICT (symbol) DO UPDATE SET
                      name = EXCLUDED.name,
                      isin = EXCLUDED.isin,
                      has_options = EXCLUDED.has_options,
-                     last_updated = EXCLUDED.last_updated""",
-                stock["symbol"],
-                stock["name"],
-                stock["isin"],
-                bool(stock["has_options"]),
+                     last_updated = EXCLUDED.last_updated
+                   WHERE (stocks.name, stocks.isin, stocks.has_options)
+                     IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.isin, EXCLUDED.has_options)""",
+                [stock["symbol"] for stock in stock_list],
+                [stock["name"] for stock in stock_list],
+                [stock["isin"] for stock in stock_list],
+                [bool(stock["has_options"]) for stock in stock_list],
                 datetime.now().strftime("%Y-%m-%d"),
             )
+            await conn.execute(
+                """INSERT INTO app_metadata (key, value, updated_at) VALUES ($1, $2, now())
+                   ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at""",
+                STOCKS_HASH_KEY,
+                digest,
+            )
+    written = status != "INSERT 0 0"
+    if written:
+        await bus.publish(pool, "stocks")
+    return written
@@ -2,20 +2,48 @@ import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.compression import CompressionMiddleware
+from app.core.invalidation import bus
+from app.core.loop_monitor import loop_lag_monitor
+from app.core.metrics import registry
+from app import database
 from app.database import init_db, close_db, populate_stocks
 from app.core.constants import STOCK_LIST
-from app.routers import auth, screening, market_data, options, orders, stocks
+from app.routers import auth, backtest, screening, market_data, options, orders, stocks
+from app.services import candle_cache, intraday_store, price_store, screening_runner
+from app.services.compute_pool import get_executor, shutdown_executor
+from app.services.history_writer import history_writer
+from app.services.market_feed import instrument_key, market_feed
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    bus.start()
+    history_writer.start()
     await populate_stocks(STOCK_LIST)
+    await price_store.sync_blocks()
+    await candle_cache.refresh()
+    await intraday_store.apply_retention()
+    # Serve the last persisted screening results from the first request on
+    await screening_runner.restore_last_results()
+    screening_runner.start_sync()
+    await market_feed.subscribe({instrument_key(s["isin"]): s["symbol"] for s in STOCK_LIST})
+    market_feed.start()
+    get_executor()
+    loop_lag_monitor.start()
     yield
     # Shutdown
+    await loop_lag_monitor.stop()
+    await market_feed.stop()
+    # Store candles still queued before the pool closes
+    await history_writer.stop()
+    await bus.stop()
+    shutdown_executor()
     await close_db()
 
 
@@ -41,6 +69,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 # Register routers
 app.include_router(auth.router)
@@ -49,8 +78,24 @@ app.include_router(market_data.router)
 app.include_router(options.router)
 app.include_router(orders.router)
 app.include_router(stocks.router)
+app.include_router(backtest.router)
 
 
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok", "service": "stock-screener-api"}
+    # Only an existing pool is reported; creating one would block while the DB is down
+    db_pool = database._pool.snapshot() if database._pool is not None else None
+    return {
+        "status": "ok",
+        "service": "stock-screener-api",
+        "event_loop_lag": loop_lag_monitor.snapshot(),
+        "db_pool": db_pool,
+        "market_feed": market_feed.snapshot(),
+        "candle_cache": candle_cache.snapshot(),
+    }
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
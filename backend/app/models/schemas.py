@@ -83,6 +83,7 @@ class ScreeningResult(BaseModel):
     indicators: list[dict]
     raw_data: list[dict]
     last_updated: str
+    stale: bool = False
 
 
 class ScreeningResponse(BaseModel):
@@ -91,6 +92,14 @@ class ScreeningResponse(BaseModel):
     neutral: list[ScreeningResult]
     total: int
     timestamp: str
+    stage_timings: dict[str, float] = {}
+    mode: str = ""
+    partial: bool = False
+    timed_out: list[str] = []
+    as_of: str | None = None
+    version: int | None = None
+    # Taken from a snapshot published by an earlier or another worker's run
+    shared: bool = False
 
 
 # --- Market Data Schemas ---
@@ -0,0 +1,112 @@
+import re
+from datetime import date, datetime, timedelta
+
+import asyncpg
+
+from app.core.timezone import IST
+
+PARTITION_PREFIX = "intraday_prices_p"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+async def ensure_partition(pool: asyncpg.Pool, day: date) -> bool:
+    """Create the intraday_prices partition holding ``day`` (an IST trading day)."""
+    start = datetime.combine(day, datetime.min.time(), IST)
+    try:
+        await pool.execute(
+            f"""CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF intraday_prices
+                FOR VALUES FROM ('{start.isoformat()}') TO ('{(start + timedelta(days=1)).isoformat()}')"""
+        )
+        return True
+    except asyncpg.DuplicateTableError:
+        return True  # Created concurrently by another worker
+    except Exception:
+        return False
+
+
+async def drop_partitions_before(pool: asyncpg.Pool, day: date) -> list[str]:
+    """Drop intraday_prices partitions for days before ``day``; returns the dropped names."""
+    try:
+        rows = await pool.fetch(
+            """SELECT c.relname FROM pg_inherits i
+               JOIN pg_class c ON c.oid = i.inhrelid
+               WHERE i.inhparent = 'intraday_prices'::regclass"""
+        )
+        dropped = []
+        for r in rows:
+            match = _PARTITION_NAME.match(r["relname"])
+            if match and datetime.strptime(match.group(1), "%Y%m%d").date() < day:
+                await pool.execute(f"DROP TABLE IF EXISTS {r['relname']}")
+                dropped.append(r["relname"])
+        return dropped
+    except Exception:
+        return []
+
+
+async def save_intraday(pool: asyncpg.Pool, symbol: str, candles: list[dict]) -> bool:
+    """Upsert 1-minute candles (``ts`` as aware datetimes) in one statement."""
+    if not candles:
+        return True
+    try:
+        await pool.execute(
+            """INSERT INTO intraday_prices (symbol, ts, open, high, low, close, volume)
+               SELECT $1, * FROM unnest(
+                 $2::timestamptz[], $3::float8[], $4::float8[], $5::float8[], $6::float8[], $7::int8[]
+               )
+               ON CONFLICT (symbol, ts) DO UPDATE SET
+                 open = EXCLUDED.open,
+                 high = EXCLUDED.high,
+                 low = EXCLUDED.low,
+                 close = EXCLUDED.close,
+                 volume = EXCLUDED.volume""",
+            symbol,
+            [c["ts"] for c in candles],
+            [float(c["open"]) for c in candles],
+            [float(c["high"]) for c in candles],
+            [float(c["low"]) for c in candles],
+            [float(c["close"]) for c in candles],
+            [int(c["volume"]) for c in candles],
+        )
+        return True
+    except Exception:
+        return False
+
+
+async def get_last_timestamp(pool: asyncpg.Pool, symbol: str, since: datetime) -> datetime | None:
+    """Timestamp of the newest stored candle of ``symbol`` at or after ``since``."""
+    try:
+        return await pool.fetchval(
+            "SELECT max(ts) FROM intraday_prices WHERE symbol = $1 AND ts >= $2", symbol, since
+        )
+    except Exception:
+        return None
+
+
+async def get_intraday(pool: asyncpg.Pool, symbol: str, start: datetime, end: datetime) -> list[dict]:
+    """Stored candles in [start, end), newest first, shaped like the API's (IST ISO datetimes)."""
+    try:
+        rows = await pool.fetch(
+            """SELECT ts, open, high, low, close, volume FROM intraday_prices
+               WHERE symbol = $1 AND ts >= $2 AND ts < $3
+               ORDER BY ts DESC""",
+            symbol,
+            start,
+            end,
+        )
+        return [
+            {
+                "datetime": r["ts"].astimezone(IST).isoformat(),
+                "open": r["open"],
+                "high": r["high"],
+                "low": r["low"],
+                "close": r["close"],
+                "volume": r["volume"],
+            }
+            for r in rows
+        ]
+    except Exception:
+        return []
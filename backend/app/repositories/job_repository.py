@@ -0,0 +1,65 @@
+import asyncpg
+import json
+
+
+async def save_job(
+    pool: asyncpg.Pool,
+    job_id: str,
+    status: dict,
+    encoding: str | None = None,
+    payload: bytes | None = None,
+) -> bool:
+    """Insert or update a screening job's status view, and its encoded result once finished."""
+    try:
+        await pool.execute(
+            """INSERT INTO screening_jobs (id, status, state, encoding, result, updated_at)
+               VALUES ($1, $2, $3::jsonb, $4, $5, now())
+               ON CONFLICT (id) DO UPDATE SET
+                 status = EXCLUDED.status,
+                 state = EXCLUDED.state,
+                 encoding = COALESCE(EXCLUDED.encoding, screening_jobs.encoding),
+                 result = COALESCE(EXCLUDED.result, screening_jobs.result),
+                 updated_at = now()""",
+            job_id,
+            status["status"],
+            json.dumps(status, default=str),
+            encoding,
+            payload,
+        )
+        return True
+    except Exception:
+        return False
+
+
+async def get_job(pool: asyncpg.Pool, job_id: str, with_result: bool = False) -> dict | None:
+    """A stored job: its status view and seconds since the last update (plus the encoded result)."""
+    result_columns = ", encoding, result" if with_result else ""
+    try:
+        row = await pool.fetchrow(
+            f"""SELECT state, EXTRACT(EPOCH FROM now() - updated_at) AS age{result_columns}
+                FROM screening_jobs WHERE id = $1""",
+            job_id,
+        )
+        if row:
+            job = {"state": json.loads(row["state"]), "age": float(row["age"])}
+            if with_result:
+                job["encoding"] = row["encoding"]
+                job["result"] = row["result"]
+            return job
+        return None
+    except Exception:
+        return None
+
+
+async def delete_finished_jobs(pool: asyncpg.Pool, older_than: float) -> int:
+    """Delete finished jobs not updated for ``older_than`` seconds; returns how many."""
+    try:
+        result = await pool.execute(
+            """DELETE FROM screening_jobs
+               WHERE status IN ('completed', 'failed')
+                 AND updated_at < now() - make_interval(secs => $1)""",
+            older_than,
+        )
+        return int(result.split()[-1])
+    except Exception:
+        return 0
@@ -0,0 +1,148 @@
+from datetime import date
+
+import asyncpg
+import numpy as np
+
+# One row per symbol per calendar year; a 200-bar lookup reads one or two rows
+BLOCK_PERIOD = "year"
+# Postgres stores DATE as days since 2000-01-01
+_PG_EPOCH = np.datetime64("2000-01-01", "D")
+COLUMNS = ("open", "high", "low", "close", "volume")
+_ELEMENT_TYPES = {"date": ">i4", "open": ">f8", "high": ">f8", "low": ">f8", "close": ">f8", "volume": ">i8"}
+_NATIVE_TYPES = {"date": "datetime64[D]", "volume": np.int64}
+
+
+def _decode_array(payload: bytes, column: str) -> np.ndarray:
+    """Decode an ``array_send`` payload (one-dimensional, no NULLs) without per-element objects."""
+    ndim = int.from_bytes(payload[:4], "big")
+    element = np.dtype([("length", ">i4"), ("value", _ELEMENT_TYPES[column])])
+    values = np.frombuffer(payload, dtype=element, offset=12 + 8 * ndim)["value"] if ndim else np.empty(0)
+    if column == "date":
+        return _PG_EPOCH + values.astype(np.int64)
+    return values.astype(_NATIVE_TYPES.get(column, np.float64))
+
+
+def _collect(rows) -> dict[str, dict[str, np.ndarray]]:
+    blocks: dict[str, dict[str, list]] = {}
+    for r in rows:
+        columns = blocks.setdefault(r["symbol"], {key: [] for key in ("date",) + COLUMNS})
+        for key, parts in columns.items():
+            parts.append(_decode_array(r[key], key))
+    return {symbol: {key: np.concatenate(parts) for key, parts in columns.items()} for symbol, columns in blocks.items()}
+
+
+async def refresh_blocks(pool: asyncpg.Pool, symbols: list[str] | None = None, since: date | None = None) -> bool:
+    """Rebuild blocks from daily_prices (all symbols when None; only periods from ``since`` on)."""
+    try:
+        await pool.execute(
+            f"""INSERT INTO daily_price_blocks (symbol, period, date, open, high, low, close, volume)
+               SELECT symbol, date_trunc('{BLOCK_PERIOD}', date)::date,
+                      array_agg(date ORDER BY date),
+                      array_agg(COALESCE(open, 'NaN') ORDER BY date),
+                      array_agg(COALESCE(high, 'NaN') ORDER BY date),
+                      array_agg(COALESCE(low, 'NaN') ORDER BY date),
+                      array_agg(COALESCE(close, 'NaN') ORDER BY date),
+                      array_agg(COALESCE(volume, 0) ORDER BY date)
+               FROM daily_prices
+               WHERE ($1::text[] IS NULL OR symbol = ANY($1::text[]))
+                 AND ($2::date IS NULL OR date >= date_trunc('{BLOCK_PERIOD}', $2::date))
+               GROUP BY 1, 2
+               ON CONFLICT (symbol, period) DO UPDATE SET
+                 date = EXCLUDED.date,
+                 open = EXCLUDED.open,
+                 high = EXCLUDED.high,
+                 low = EXCLUDED.low,
+                 close = EXCLUDED.close,
+                 volume = EXCLUDED.volume""",
+            symbols,
+            since,
+        )
+        return True
+    except Exception:
+        return False
+
+
+async def get_stale_symbols(pool: asyncpg.Pool) -> list[str]:
+    """Symbols whose blocks disagree with daily_prices on row count or latest date."""
+    try:
+        rows = await pool.fetch(
+            """WITH stored AS (
+                 SELECT symbol, count(*) AS bars, max(date) AS last FROM daily_prices GROUP BY symbol
+               ), blocked AS (
+                 SELECT symbol, sum(cardinality(date)) AS bars, max(date[cardinality(date)]) AS last
+                 FROM daily_price_blocks GROUP BY symbol
+               )
+               SELECT s.symbol FROM stored s LEFT JOIN blocked b USING (symbol)
+               WHERE b.bars IS DISTINCT FROM s.bars OR b.last IS DISTINCT FROM s.last"""
+        )
+        return [r["symbol"] for r in rows]
+    except Exception:
+        return []
+
+
+async def get_latest_arrays(
+    pool: asyncpg.Pool, symbols: list[str], days: int = 200, as_of: date | None = None
+) -> dict[str, dict[str, np.ndarray]]:
+    """The latest ``days`` bars (on or before ``as_of``) per symbol as ascending NumPy columns."""
+    # Bars after ``as_of`` in its own block are counted by the window sum, so allow a period's worth more
+    slack = 366 if as_of else 0
+    try:
+        rows = await pool.fetch(
+            """SELECT symbol, array_send(date) AS date, array_send(open) AS open,
+                      array_send(high) AS high, array_send(low) AS low,
+                      array_send(close) AS close, array_send(volume) AS volume
+               FROM (
+                 SELECT b.*, sum(cardinality(b.date)) OVER (
+                          PARTITION BY b.symbol ORDER BY b.period DESC
+                        ) - cardinality(b.date) AS newer
+                 FROM daily_price_blocks b
+                 WHERE b.symbol = ANY($1::text[]) AND ($3::date IS NULL OR b.period <= $3)
+               ) b
+               WHERE newer < $2::int + $4::int
+               ORDER BY symbol, period""",
+            symbols,
+            days,
+            as_of,
+            slack,
+        )
+    except Exception:
+        return {}
+    result = {}
+    for symbol, columns in _collect(rows).items():
+        end = np.searchsorted(columns["date"], np.datetime64(as_of, "D"), side="right") if as_of else None
+        latest = {key: values[:end][-days:] for key, values in columns.items()}
+        if latest["date"].size:
+            result[symbol] = latest
+    return result
+
+
+async def get_range_arrays(
+    pool: asyncpg.Pool, symbols: list[str], start: date | None = None, end: date | None = None
+) -> dict[str, dict[str, np.ndarray]]:
+    """All bars in [start, end] per symbol as ascending NumPy columns."""
+    try:
+        rows = await pool.fetch(
+            f"""SELECT symbol, array_send(date) AS date, array_send(open) AS open,
+                      array_send(high) AS high, array_send(low) AS low,
+                      array_send(close) AS close, array_send(volume) AS volume
+               FROM daily_price_blocks
+               WHERE symbol = ANY($1::text[])
+                 AND ($2::date IS NULL OR period >= date_trunc('{BLOCK_PERIOD}', $2::date))
+                 AND ($3::date IS NULL OR period <= $3)
+               ORDER BY symbol, period""",
+            symbols,
+            start,
+            end,
+        )
+    except Exception:
+        return {}
+    result = {}
+    for symbol, columns in _collect(rows).items():
+        mask = np.ones(columns["date"].size, dtype=bool)
+        if start:
+            mask &= columns["date"] >= np.datetime64(start, "D")
+        if end:
+            mask &= columns["date"] <= np.datetime64(end, "D")
+        if mask.any():
+            result[symbol] = {key: values[mask] for key, values in columns.items()}
+    return result
@@ -1,5 +1,14 @@
+from datetime import date
+
 import asyncpg
 
+from app.core.invalidation import bus
+
+
+def as_date(value: date | str | None) -> date | None:
+    """daily_prices.date is a DATE column; accept 'YYYY-MM-DD' strings from callers."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
 
 async def save_historical_data(pool: asyncpg.Pool, symbol: str, data: list[dict]) -> bool:
     """Save historical price data to database."""
@@ -16,13 +25,60 @@ async def save_historical_data(pool: asyncpg.Pool, symbol: str, data: list[dict]
                          close = EXCLUDED.close,
                          volume = EXCLUDED.volume""",
                     symbol,
-                    day["date"],
+                    as_date(day["date"]),
                     day["open"],
                     day["high"],
                     day["low"],
                     day["close"],
                     day["volume"],
                 )
+        await bus.publish(pool, "daily_prices", symbol)
+        return True
+    except Exception:
+        return False
+
+
+async def copy_historical_data(pool: asyncpg.Pool, histories: dict[str, list[dict]]) -> bool:
+    """Upsert candles of many symbols at once: COPY into a staging table, then one INSERT."""
+    # One row per (symbol, date); a later candle for the same day wins
+    merged = {}
+    for symbol, data in histories.items():
+        for day in data:
+            merged[(symbol, as_date(day["date"]))] = (
+                float(day["open"]),
+                float(day["high"]),
+                float(day["low"]),
+                float(day["close"]),
+                int(day["volume"]),
+            )
+    if not merged:
+        return True
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """CREATE TEMP TABLE daily_prices_staging (
+                         symbol TEXT, date DATE, open DOUBLE PRECISION, high DOUBLE PRECISION,
+                         low DOUBLE PRECISION, close DOUBLE PRECISION, volume BIGINT
+                       ) ON COMMIT DROP"""
+                )
+                await conn.copy_records_to_table(
+                    "daily_prices_staging",
+                    records=[key + values for key, values in merged.items()],
+                    columns=["symbol", "date", "open", "high", "low", "close", "volume"],
+                )
+                await conn.execute(
+                    """INSERT INTO daily_prices (symbol, date, open, high, low, close, volume)
+                       SELECT symbol, date, open, high, low, close, volume FROM daily_prices_staging
+                       ON CONFLICT (symbol, date) DO UPDATE SET
+                         open = EXCLUDED.open,
+                         high = EXCLUDED.high,
+                         low = EXCLUDED.low,
+                         close = EXCLUDED.close,
+                         volume = EXCLUDED.volume"""
+                )
+        for symbol in histories:
+            await bus.publish(pool, "daily_prices", symbol)
         return True
     except Exception:
         return False
@@ -49,3 +105,73 @@ async def get_historical_data(pool: asyncpg.Pool, symbol: str, days: int = 200)
         ]
     except Exception:
         return []
+
+
+async def get_historical_data_bulk(
+    pool: asyncpg.Pool, symbols: list[str], days: int = 200, as_of: date | str | None = None
+) -> dict[str, list[dict]]:
+    """Get the latest ``days`` rows for many symbols in one query: {symbol: rows_desc}.
+
+    With ``as_of`` (YYYY-MM-DD) only rows on or before that date are considered;
+    each symbol is still a single range scan on (symbol, date).
+    """
+    as_of_filter = "AND date <= $3" if as_of else ""
+    args = (symbols, days, as_date(as_of)) if as_of else (symbols, days)
+    try:
+        rows = await pool.fetch(
+            f"""SELECT s.symbol, p.date, p.open, p.high, p.low, p.close, p.volume
+               FROM unnest($1::text[]) AS s(symbol)
+               CROSS JOIN LATERAL (
+                 SELECT date, open, high, low, close, volume FROM daily_prices
+                 WHERE symbol = s.symbol {as_of_filter} ORDER BY date DESC LIMIT $2
+               ) p
+               ORDER BY s.symbol, p.date DESC""",
+            *args,
+        )
+        result: dict[str, list[dict]] = {}
+        for r in rows:
+            result.setdefault(r["symbol"], []).append(
+                {
+                    "date": r["date"],
+                    "open": r["open"],
+                    "high": r["high"],
+                    "low": r["low"],
+                    "close": r["close"],
+                    "volume": r["volume"],
+                }
+            )
+        return result
+    except Exception:
+        return {}
+
+
+async def get_price_panel(
+    pool: asyncpg.Pool,
+    symbols: list[str],
+    start: date | str | None = None,
+    end: date | str | None = None,
+) -> dict[str, dict[str, list]]:
+    """Full daily history per symbol as ascending columns: {symbol: {"date": [...], "close": [...], ...}}."""
+    try:
+        rows = await pool.fetch(
+            """SELECT symbol, date, open, high, low, close, volume FROM daily_prices
+               WHERE symbol = ANY($1::text[])
+                 AND ($2::date IS NULL OR date >= $2)
+                 AND ($3::date IS NULL OR date <= $3)
+               ORDER BY symbol, date""",
+            symbols,
+            as_date(start),
+            as_date(end),
+        )
+        result: dict[str, dict[str, list]] = {}
+        for r in rows:
+            columns = result.get(r["symbol"])
+            if columns is None:
+                columns = result[r["symbol"]] = {
+                    "date": [], "open": [], "high": [], "low": [], "close": [], "volume": []
+                }
+            for key, values in columns.items():
+                values.append(r[key])
+        return result
+    except Exception:
+        return {}
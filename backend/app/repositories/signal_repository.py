@@ -0,0 +1,79 @@
+import asyncpg
+from datetime import datetime
+
+from app.core.timezone import IST
+
+INSERT_BATCH_SIZE = 500
+
+
+async def save_signal_events(pool: asyncpg.Pool, events: list[dict]) -> bool:
+    """Insert trend transitions, one multi-row statement per batch."""
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                for i in range(0, len(events), INSERT_BATCH_SIZE):
+                    batch = events[i : i + INSERT_BATCH_SIZE]
+                    await conn.execute(
+                        """INSERT INTO signal_events
+                             (symbol, previous_trend, trend, price, macd_hist, mode, run_id, occurred_at)
+                           SELECT * FROM unnest(
+                             $1::text[], $2::text[], $3::text[], $4::float8[],
+                             $5::float8[], $6::text[], $7::int[], $8::timestamptz[]
+                           )""",
+                        [e["symbol"] for e in batch],
+                        [e["previous_trend"] for e in batch],
+                        [e["trend"] for e in batch],
+                        [e["price"] for e in batch],
+                        [e["macd_hist"] for e in batch],
+                        [e["mode"] for e in batch],
+                        [e["run_id"] for e in batch],
+                        [e["occurred_at"] for e in batch],
+                    )
+        return True
+    except Exception:
+        return False
+
+
+async def get_signal_events(
+    pool: asyncpg.Pool,
+    trend: str | None = None,
+    symbol: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """Transitions, newest first, filtered by target trend, symbol and time range."""
+    conditions, args = [], []
+    for column, op, value in (
+        ("trend", "=", trend),
+        ("symbol", "=", symbol),
+        ("occurred_at", ">=", since),
+        ("occurred_at", "<", until),
+    ):
+        if value is not None:
+            args.append(value)
+            conditions.append(f"{column} {op} ${len(args)}")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    args.append(limit)
+    try:
+        rows = await pool.fetch(
+            f"""SELECT symbol, previous_trend, trend, price, macd_hist, mode, run_id, occurred_at
+                FROM signal_events {where}
+                ORDER BY occurred_at DESC LIMIT ${len(args)}""",
+            *args,
+        )
+        return [
+            {
+                "symbol": r["symbol"],
+                "previous_trend": r["previous_trend"],
+                "trend": r["trend"],
+                "price": r["price"],
+                "macd_hist": r["macd_hist"],
+                "mode": r["mode"],
+                "run_id": r["run_id"],
+                "occurred_at": r["occurred_at"].astimezone(IST).isoformat(),
+            }
+            for r in rows
+        ]
+    except Exception:
+        return []
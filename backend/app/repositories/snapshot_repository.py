@@ -0,0 +1,85 @@
+import asyncpg
+from datetime import datetime
+
+
+async def save_snapshot(
+    pool: asyncpg.Pool,
+    name: str,
+    mode: str,
+    encoding: str,
+    payload: bytes,
+    created_at: datetime,
+    run_key: str | None = None,
+) -> int | None:
+    """Store an encoded screening snapshot, replacing an older one of that name.
+
+    Returns the snapshot's new version (None if a newer snapshot is already
+    stored or the write failed).
+    """
+    try:
+        return await pool.fetchval(
+            """INSERT INTO screening_snapshots
+                 (name, mode, encoding, payload, created_at, run_key, version)
+               VALUES ($1, $2, $3, $4, $5, $6, 1)
+               ON CONFLICT (name) DO UPDATE SET
+                 mode = EXCLUDED.mode,
+                 encoding = EXCLUDED.encoding,
+                 payload = EXCLUDED.payload,
+                 created_at = EXCLUDED.created_at,
+                 run_key = EXCLUDED.run_key,
+                 version = screening_snapshots.version + 1
+               WHERE screening_snapshots.created_at <= EXCLUDED.created_at
+               RETURNING version""",
+            name,
+            mode,
+            encoding,
+            payload,
+            created_at,
+            run_key,
+        )
+    except Exception:
+        return None
+
+
+async def get_snapshot(pool: asyncpg.Pool, name: str) -> dict | None:
+    """Get a stored snapshot record (payload still encoded)."""
+    try:
+        row = await pool.fetchrow(
+            """SELECT mode, encoding, payload, created_at, version, run_key
+               FROM screening_snapshots WHERE name = $1""",
+            name,
+        )
+        if row:
+            return {
+                "mode": row["mode"],
+                "encoding": row["encoding"],
+                "payload": row["payload"],
+                "created_at": row["created_at"],
+                "version": row["version"],
+                "run_key": row["run_key"],
+            }
+        return None
+    except Exception:
+        return None
+
+
+async def get_snapshot_info(pool: asyncpg.Pool, name: str) -> dict | None:
+    """Version, run key and age of a stored snapshot, without its payload."""
+    try:
+        row = await pool.fetchrow(
+            """SELECT mode, version, run_key, created_at,
+                      EXTRACT(EPOCH FROM now() - created_at) AS age
+               FROM screening_snapshots WHERE name = $1""",
+            name,
+        )
+        if row:
+            return {
+                "mode": row["mode"],
+                "version": row["version"],
+                "run_key": row["run_key"],
+                "created_at": row["created_at"],
+                "age": float(row["age"]),
+            }
+        return None
+    except Exception:
+        return None
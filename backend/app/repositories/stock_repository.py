@@ -1,5 +1,10 @@
 import asyncpg
 
+from app.core.invalidation import LocalCache
+
+# ISIN per symbol; dropped in every worker when the stocks table is repopulated
+_isin_cache = LocalCache("stocks")
+
 
 async def get_all_stocks(pool: asyncpg.Pool) -> list[dict]:
     """Get all stocks from database."""
@@ -16,6 +21,9 @@ async def get_all_stocks(pool: asyncpg.Pool) -> list[dict]:
 
 
 async def get_stock_isin(pool: asyncpg.Pool, symbol: str) -> str | None:
-    """Get ISIN for a symbol from database."""
-    result = await pool.fetchval("SELECT isin FROM stocks WHERE symbol = $1", symbol)
-    return result
+    """Get ISIN for a symbol from database (cached until the stocks table changes)."""
+    return await _isin_cache.get_or_load(
+        symbol,
+        lambda: pool.fetchval("SELECT isin FROM stocks WHERE symbol = $1", symbol),
+        cache_if=lambda isin: isin is not None,
+    )
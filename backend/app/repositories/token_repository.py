@@ -1,6 +1,11 @@
 import asyncpg
 from datetime import datetime
 
+from app.core.invalidation import LocalCache, bus
+
+# Latest token record; every worker drops it when any of them saves or deletes a token
+_token_cache = LocalCache("token")
+
 
 async def save_token(
     pool: asyncpg.Pool,
@@ -19,13 +24,23 @@ async def save_token(
                 expires_at,
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             )
+        await bus.publish(pool, "token")
         return True
     except Exception:
         return False
 
 
 async def get_latest_token(pool: asyncpg.Pool) -> dict | None:
-    """Get the most recent token record."""
+    """Get the most recent token record (cached until a token is saved or deleted)."""
+    # None is not cached: it may stand for a failed query rather than no token
+    return await _token_cache.get_or_load(
+        "latest",
+        lambda: _fetch_latest_token(pool),
+        cache_if=lambda token: token is not None,
+    )
+
+
+async def _fetch_latest_token(pool: asyncpg.Pool) -> dict | None:
     try:
         result = await pool.fetchrow(
             "SELECT access_token, refresh_token, expires_at, created_at FROM api_tokens ORDER BY id DESC LIMIT 1"
@@ -46,6 +61,7 @@ async def delete_token(pool: asyncpg.Pool) -> bool:
     """Delete all stored tokens."""
     try:
         await pool.execute("DELETE FROM api_tokens")
+        await bus.publish(pool, "token")
         return True
     except Exception:
         return False
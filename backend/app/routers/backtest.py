@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Query
+
+from app.services import backtest, param_sweep
+
+router = APIRouter(prefix="/api/backtest", tags=["backtest"])
+
+
+def _int_list(value: str) -> list[int]:
+    return sorted({int(v) for v in value.split(",") if v.strip()})
+
+
+@router.get("/signals")
+async def backtest_signals(
+    start: str | None = Query(None, description="First signal date (YYYY-MM-DD)"),
+    end: str | None = Query(None, description="Last signal date (YYYY-MM-DD)"),
+    horizons: str = Query("1,5,10", description="Comma-separated forward-return horizons in bars"),
+    rule_set: str | None = None,
+    symbols: str | None = Query(None, description="Comma-separated symbols (default: full universe)"),
+):
+    """Replay the screening classification over stored daily history.
+
+    Reports forward returns and hit rates per trend, plus daily signal turnover.
+    """
+    try:
+        horizon_list = _int_list(horizons)
+    except ValueError:
+        return {"error": f"Invalid horizons {horizons!r}"}
+    if not horizon_list or horizon_list[0] < 1:
+        return {"error": "Horizons must be positive integers"}
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+
+    try:
+        result = await backtest.run_backtest(symbol_list, start, end, horizon_list, rule_set)
+    except KeyError as e:
+        return {"error": str(e.args[0])}
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+    if result is None:
+        return {"error": "No stored daily history to backtest"}
+    return result
+
+
+@router.get("/sweep")
+async def sweep_parameters(
+    fast: str = Query("12", description="MACD fast periods, comma-separated"),
+    slow: str = Query("26", description="MACD slow periods"),
+    signal: str = Query("9", description="MACD signal periods"),
+    tenkan: str = Query("9", description="Ichimoku tenkan periods"),
+    kijun: str = Query("26", description="Ichimoku kijun periods"),
+    senkou_b: str = Query("52", description="Ichimoku senkou span B periods"),
+    metric: str = Query("hit_rate", description="hit_rate, mean_return, excess_return or count"),
+    trend: str = "Bullish",
+    horizon: int = Query(5, ge=1),
+    top: int = Query(10, ge=1),
+    min_signals: int = Query(30, ge=0),
+    start: str | None = None,
+    end: str | None = None,
+    rule_set: str | None = None,
+):
+    """Backtest a grid of MACD / Ichimoku periods and return the best combinations.
+
+    Results are cached per data version, so repeating or extending a sweep only
+    computes the new combinations.
+    """
+    if metric not in param_sweep.METRICS:
+        return {"error": f"Unknown metric {metric!r}"}
+    try:
+        grid = param_sweep.parameter_grid(
+            _int_list(fast), _int_list(slow), _int_list(signal),
+            _int_list(tenkan), _int_list(kijun), _int_list(senkou_b),
+        )
+    except ValueError:
+        return {"error": "Periods must be comma-separated integers"}
+    if not grid:
+        return {"error": "No valid combinations (need fast < slow and tenkan < kijun < senkou_b)"}
+    if len(grid) > param_sweep.MAX_COMBINATIONS:
+        return {"error": f"{len(grid)} combinations exceeds the limit of {param_sweep.MAX_COMBINATIONS}"}
+
+    try:
+        result = await param_sweep.run_sweep(
+            grid, start, end, rule_set_name=rule_set, metric=metric, trend=trend,
+            horizon=horizon, top=top, min_signals=min_signals,
+        )
+    except KeyError as e:
+        return {"error": str(e.args[0])}
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+    if result is None:
+        return {"error": "No stored daily history to backtest"}
+    return result
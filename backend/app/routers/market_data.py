@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Depends
+import json
+from datetime import date
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 
 from app.core.dependencies import get_upstox_api
+from app.core.responses import negotiated_response
+from app.services import intraday_store
+from app.services.market_feed import market_feed
 from app.services.upstox_api import UpstoxAPI
 
 router = APIRouter(prefix="/api/market", tags=["market_data"])
@@ -8,6 +15,7 @@ router = APIRouter(prefix="/api/market", tags=["market_data"])
 
 @router.get("/historical/{symbol}")
 async def get_historical(
+    request: Request,
     symbol: str,
     days: int = 200,
     api: UpstoxAPI = Depends(get_upstox_api),
@@ -15,23 +23,34 @@ async def get_historical(
     """Historical daily candles (200 days)."""
     data = await api.get_historical_data(symbol, days=days)
     if data:
-        return {"data": data}
+        return negotiated_response(request, {"data": data})
     return {"data": [], "error": "No historical data available"}
 
 
 @router.get("/intraday/{symbol}")
 async def get_intraday(
+    request: Request,
     symbol: str,
     interval: int = 1,
     api: UpstoxAPI = Depends(get_upstox_api),
 ):
-    """Intraday candles (1min or 30min)."""
-    data, error = await api.get_current_data(symbol, interval_minutes=interval)
+    """Intraday candles; intervals above 1 minute are resampled from 1-minute candles."""
+    data, error = await intraday_store.get_current_data(api, symbol, interval_minutes=interval)
     if data:
-        return {"data": data}
+        return negotiated_response(request, {"data": data})
     return {"data": [], "error": error}
 
 
+@router.get("/intraday/{symbol}/range")
+async def get_intraday_range(request: Request, symbol: str, start: date, end: date | None = None):
+    """Stored 1-minute candles for the IST days start..end (default: start only), newest first."""
+    end = end or start
+    if end < start:
+        return {"data": [], "error": "end must not be before start"}
+    data = await intraday_store.get_range(symbol, start, end)
+    return negotiated_response(request, {"data": data})
+
+
 @router.get("/ltp/{instrument_key:path}")
 async def get_ltp(
     instrument_key: str,
@@ -42,3 +61,24 @@ async def get_ltp(
     if ltp is not None:
         return {"ltp": ltp}
     return {"ltp": None, "error": error}
+
+
+# Seconds without a tick before an SSE comment keeps the connection open
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/stream")
+async def stream_ticks(request: Request, symbols: str | None = None):
+    """Server-sent events of live ticks from the market feed (comma-separated symbols, default all)."""
+    if not market_feed.url:
+        return {"data": [], "error": "Market feed not configured"}
+    wanted = {s.strip() for s in symbols.split(",") if s.strip()} if symbols else None
+
+    async def events():
+        async with market_feed.stream(wanted, idle_timeout=STREAM_KEEPALIVE_SECONDS) as ticks:
+            async for tick in ticks:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n" if tick is None else f"data: {json.dumps(tick)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,66 +1,144 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, time, timedelta
+
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.core.dependencies import get_upstox_api
 from app.core.constants import STOCK_LIST
-from app.core.timezone import now_ist
+from app.core.responses import negotiated_response
+from app.core.timezone import IST, now_ist
+from app.database import get_pool
+from app.repositories import signal_repository
 from app.services.upstox_api import UpstoxAPI
-from app.services import screening_service
+from app.services import screening_jobs, screening_runner, screening_service
+from app.services.screening_stats import get_stats
 from app.models.schemas import ScreeningResponse
 
 router = APIRouter(prefix="/api/screening", tags=["screening"])
 
-# Cache for last screening results
-_last_results: dict | None = None
-
 
 @router.post("/run", response_model=ScreeningResponse)
 async def run_screening(
+    request: Request,
     use_mock: bool = True,
     use_live_data: bool = False,
     intraday_interval: int = 1,
+    deadline: float | None = Query(None, gt=0, description="Run time budget in seconds"),
+    as_of: date | None = Query(None, description="Screen stored history up to this date"),
+    fresh: bool = Query(False, description="Scan even if a recent identical snapshot exists"),
     api: UpstoxAPI = Depends(get_upstox_api),
 ):
-    """Screen all 211 stocks (returns bullish/bearish/neutral)."""
-    global _last_results
-
-    results = await screening_service.screen_stocks(
-        STOCK_LIST, api, use_live_data, intraday_interval, use_mock
+    """Screen all 211 stocks (returns bullish/bearish/neutral).
+
+    With ``deadline``, symbols still pending when it expires are listed in
+    ``timed_out`` and served from the previous results where available.
+    Concurrent calls with the same parameters share a single run.
+
+    With ``as_of``, the run uses stored daily history truncated at that date
+    (no mock, API or live data) and does not replace the cached results.
+
+    A snapshot published by an identical run in the last SCREENING_SHARED_MAX_AGE
+    seconds is returned with ``shared`` set, unless ``fresh`` is given.
+    """
+    response = await screening_runner.run_screening(
+        api,
+        use_mock,
+        use_live_data,
+        intraday_interval,
+        deadline,
+        as_of.isoformat() if as_of else None,
+        fresh,
     )
+    return negotiated_response(request, response)
 
-    bullish = [r for r in results if r["trend"] == "Bullish"]
-    bearish = [r for r in results if r["trend"] == "Bearish"]
-    neutral = [r for r in results if r["trend"] == "Neutral/Mixed"]
 
-    # Sort by intraday strength
-    bullish.sort(key=lambda x: x["intraday_strength_pct"], reverse=False)
-    bearish.sort(key=lambda x: x["intraday_strength_pct"], reverse=False)
+@router.get("/results")
+async def get_results(request: Request):
+    """Get last cached screening results."""
+    last_results = screening_runner.get_last_results()
+    if last_results:
+        return negotiated_response(request, last_results)
+    return {"bullish": [], "bearish": [], "neutral": [], "total": 0, "timestamp": ""}
 
-    response = ScreeningResponse(
-        bullish=bullish,
-        bearish=bearish,
-        neutral=neutral,
-        total=len(results),
-        timestamp=now_ist().strftime("%Y-%m-%d %H:%M:%S"),
-    )
 
-    _last_results = response.model_dump()
-    return response
+@router.post("/jobs", status_code=202)
+async def submit_screening_job(
+    use_mock: bool = True,
+    use_live_data: bool = False,
+    intraday_interval: int = 1,
+    deadline: float | None = Query(None, gt=0, description="Run time budget in seconds"),
+    fresh: bool = Query(False, description="Scan even if a recent identical snapshot exists"),
+    api: UpstoxAPI = Depends(get_upstox_api),
+):
+    """Start a screening run in the background; poll /jobs/{job_id} for progress."""
+    return await screening_jobs.submit_job(api, use_mock, use_live_data, intraday_interval, deadline, fresh)
+
+
+@router.get("/jobs/{job_id}")
+async def get_screening_job(job_id: str):
+    """Job progress: symbols done of total, current stage and ETA."""
+    status = await screening_jobs.get_job_status(job_id)
+    if status is None:
+        return {"error": f"Job {job_id} not found"}
+    return status
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_screening_job_result(request: Request, job_id: str):
+    """Final screening response of a completed job."""
+    job = await screening_jobs.get_job(job_id)
+    if job is None:
+        return {"error": f"Job {job_id} not found"}
+    if job["status"] != "completed":
+        return {"error": f"Job {job_id} is {job['status']}", "status": job["status"]}
+    return negotiated_response(request, job["result"])
+
+
+@router.get("/as-of")
+async def screen_as_of_range(
+    request: Request,
+    start: date = Query(..., description="First as-of date"),
+    end: date = Query(..., description="Last as-of date"),
+):
+    """Point-in-time screening for every trading date in a range, from one history load."""
+    if end < start:
+        return {"error": "end must not be before start"}
+    if (end - start).days > screening_service.AS_OF_MAX_DAYS:
+        return {"error": f"Range is limited to {screening_service.AS_OF_MAX_DAYS} days"}
+    result = await screening_service.screen_as_of_range(STOCK_LIST, start.isoformat(), end.isoformat())
+    return negotiated_response(request, result)
+
+
+@router.get("/events")
+async def get_signal_events(
+    trend: str | None = Query(None, description="Trend transitioned to, e.g. Bullish"),
+    symbol: str | None = None,
+    day: date | None = Query(None, description="Trading day (IST); defaults to today"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """Trend transitions recorded between screening runs, newest first."""
+    day = day or now_ist().date()
+    since = datetime.combine(day, time.min, tzinfo=IST)
+    pool = await get_pool()
+    events = await signal_repository.get_signal_events(
+        pool, trend, symbol, since, since + timedelta(days=1), limit
+    )
+    return {"day": day.isoformat(), "events": events, "count": len(events)}
 
 
-@router.get("/results")
-async def get_results():
-    """Get last cached screening results."""
-    if _last_results:
-        return _last_results
-    return {"bullish": [], "bearish": [], "neutral": [], "total": 0, "timestamp": ""}
+@router.get("/stats")
+async def screening_stats():
+    """Per-stage timings, history sources and failure reasons of recent runs."""
+    return get_stats()
 
 
 @router.get("/stock/{symbol}")
 async def screen_single_stock(
+    request: Request,
     symbol: str,
     use_mock: bool = True,
     use_live_data: bool = False,
     intraday_interval: int = 1,
+    as_of: date | None = Query(None, description="Screen stored history up to this date"),
     api: UpstoxAPI = Depends(get_upstox_api),
 ):
     """Screen a single stock with full indicators."""
@@ -73,11 +151,11 @@ async def screen_single_stock(
     if not stock:
         return {"error": f"Stock {symbol} not found"}
 
-    result = await screening_service.fetch_single_stock_data(
-        stock, api, use_live_data, intraday_interval, use_mock
+    result, failure = await screening_service.fetch_single_stock_data(
+        stock, api, use_live_data, intraday_interval, use_mock, as_of.isoformat() if as_of else None
     )
 
     if not result:
-        return {"error": f"Could not process stock {symbol}"}
+        return {"error": f"Could not process stock {symbol}", "failure": failure}
 
-    return result
+    return negotiated_response(request, result)
@@ -26,6 +26,6 @@ async def list_stocks(pool: asyncpg.Pool = Depends(get_database)):
 
 @router.post("/reload")
 async def reload_stocks():
-    """Reload stock list from constants into database."""
-    await populate_stocks(STOCK_LIST)
-    return {"success": True, "count": len(STOCK_LIST)}
+    """Reload stock list from constants into database (only rows that differ are rewritten)."""
+    changed = await populate_stocks(STOCK_LIST, force=True)
+    return {"success": True, "count": len(STOCK_LIST), "changed": changed}
@@ -0,0 +1,207 @@
+"""
+Backtest Service - replays the screening classification over stored daily history.
+
+Each symbol's daily_prices history becomes one row of a (symbols, bars) panel.
+Indicators and the screening rule set are evaluated for every symbol and every
+past bar at once (indicator_panel + PanelContext) instead of one screening run
+per day. A bar is classified only where a screening run on that day would have
+produced a result: at least 60 bars of history and warmed-up indicators. The
+bar's close stands in for the live price.
+
+EMAs run over the whole loaded history rather than a trailing 200-bar window,
+so MACD values can differ from a same-day screening run in the far decimals.
+"""
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.config import settings
+from app.core.constants import STOCK_LIST
+from app.database import get_pool
+from app.services import price_store
+from app.services.compute_pool import run_compute
+from app.services.indicator_panel import PanelContext, indicator_panel, right_aligned
+from app.services.rules import NEUTRAL, get_rule_set
+
+HORIZONS = (1, 5, 10)
+MIN_BARS = 60  # calculate_indicators needs 60 rows
+WARMUP_DAYS = 400  # calendar days loaded before ``start`` so indicators are warm
+# Expected direction of the forward return for a trend; used for hit rates
+DIRECTIONS = {"Bullish": 1, "Bearish": -1}
+
+
+def _shift(values: np.ndarray, offset: int) -> np.ndarray:
+    """values[:, t - offset] at t (offset > 0) or values[:, t + |offset|] (offset < 0), NaN-filled."""
+    shifted = np.full(values.shape, np.nan)
+    if offset > 0:
+        shifted[:, offset:] = values[:, :-offset]
+    elif offset < 0:
+        shifted[:, :offset] = values[:, -offset:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
+def _round(value, digits=6):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def classify_panel(panel: dict[str, np.ndarray], rule_set_name: str | None = None):
+    """Trend code per (symbol, bar): index into the returned labels, -1 where not classifiable."""
+    rule_set = get_rule_set(rule_set_name or settings.SCREENING_RULE_SET)
+    labels = [trend for trend, _, _ in rule_set.rules] + [NEUTRAL[0]]
+    trends, _ = rule_set.classify(PanelContext(panel))
+
+    bars = np.cumsum(~np.isnan(panel["close"]), axis=1)
+    histogram = panel["macd_hist"]
+    eligible = (
+        (bars >= MIN_BARS)
+        & ~np.isnan(panel["senkou_span_b"])
+        & ~np.isnan(histogram)
+        & ~np.isnan(_shift(histogram, 1))
+    )
+    codes = np.full(trends.shape, -1, dtype=np.int8)
+    for code, label in enumerate(labels):
+        codes[eligible & (trends == label)] = code
+    return codes, labels
+
+
+def backtest_panel(
+    symbols: list[str],
+    dates: np.ndarray,
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    closes: np.ndarray,
+    start: str | None = None,
+    end: str | None = None,
+    horizons=HORIZONS,
+    rule_set_name: str | None = None,
+    macd_params: tuple[int, int, int] = (12, 26, 9),
+    ichimoku_params: tuple[int, int, int] = (9, 26, 52),
+) -> dict:
+    """Forward returns, hit rates and turnover of the rule set over a price panel.
+
+    ``dates`` is a datetime64[D] panel aligned with the price panels (NaT padding).
+    Runs in the compute pool.
+    """
+    started = time.perf_counter()
+    panel = indicator_panel(opens, highs, lows, closes, macd_params, ichimoku_params)
+    codes, labels = classify_panel(panel, rule_set_name)
+
+    in_window = ~np.isnat(dates)
+    if start:
+        in_window &= dates >= np.datetime64(start, "D")
+    if end:
+        in_window &= dates <= np.datetime64(end, "D")
+    codes[~in_window] = -1
+    classified = codes >= 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        forward = {h: _shift(closes, -h) / closes - 1 for h in horizons}
+
+    signals = {}
+    for code, label in enumerate(labels):
+        mask = codes == code
+        direction = DIRECTIONS.get(label, 0)
+        per_horizon = {}
+        for h, returns in forward.items():
+            values = returns[mask & ~np.isnan(returns)]
+            per_horizon[str(h)] = {
+                "count": int(values.size),
+                "mean_return": _round(values.mean()) if values.size else None,
+                "median_return": _round(np.median(values)) if values.size else None,
+                "hit_rate": _round(np.mean(np.sign(values) == direction), 4)
+                if values.size and direction
+                else None,
+            }
+        signals[label] = {"signals": int(mask.sum()), "direction": direction, "forward": per_horizon}
+
+    baseline = {}
+    for h, returns in forward.items():
+        values = returns[classified & ~np.isnan(returns)]
+        baseline[str(h)] = {
+            "count": int(values.size),
+            "mean_return": _round(values.mean()) if values.size else None,
+        }
+
+    # Turnover: share of symbols whose trend changed since their previous bar, per day
+    pairs = classified[:, 1:] & classified[:, :-1]
+    changed = (codes[:, 1:] != codes[:, :-1]) & pairs
+    pair_dates = dates[:, 1:][pairs]
+    days, index = np.unique(pair_dates, return_inverse=True)
+    compared = np.bincount(index, minlength=days.size)
+    switches = np.bincount(index, weights=changed[pairs], minlength=days.size)
+    turnover = np.divide(switches, compared, out=np.zeros(days.size), where=compared > 0)
+
+    signal_days, signal_index = np.unique(dates[classified], return_inverse=True)
+    daily_counts = {
+        label: np.bincount(signal_index, weights=codes[classified] == code, minlength=signal_days.size)
+        for code, label in enumerate(labels)
+    }
+
+    return {
+        "symbols": len(symbols),
+        "start": str(signal_days[0]) if signal_days.size else None,
+        "end": str(signal_days[-1]) if signal_days.size else None,
+        "days": int(signal_days.size),
+        "horizons": list(horizons),
+        "signals": signals,
+        "baseline": baseline,
+        "turnover": {
+            "mean_daily": _round(turnover.mean(), 4) if turnover.size else None,
+            "max_daily": _round(turnover.max(), 4) if turnover.size else None,
+            "switches": int(switches.sum()),
+        },
+        "avg_daily_signals": {
+            label: _round(counts.mean(), 2) if counts.size else None
+            for label, counts in daily_counts.items()
+        },
+        "compute_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def build_panels(histories: dict[str, dict[str, list]]):
+    """Right-aligned (symbols, bars) panels from price_store.load_range_columns columns."""
+    symbols = list(histories)
+    bars = max((len(h["date"]) for h in histories.values()), default=0)
+    dates = np.full((len(symbols), bars), np.datetime64("NaT"), dtype="datetime64[D]")
+    for i, symbol in enumerate(symbols):
+        row = histories[symbol]["date"]
+        if len(row):
+            dates[i, bars - len(row) :] = np.asarray(row, dtype="datetime64[D]")
+    prices = [
+        right_aligned([histories[symbol][key] for symbol in symbols], bars)
+        for key in ("open", "high", "low", "close")
+    ]
+    return symbols, dates, prices
+
+
+async def load_panels(symbols: list[str] | None = None, start: str | None = None):
+    """Stored daily history as panels, including WARMUP_DAYS before ``start``; None when empty."""
+    symbols = symbols or [stock["symbol"] for stock in STOCK_LIST]
+    load_start = (date.fromisoformat(start) - timedelta(days=WARMUP_DAYS)).isoformat() if start else None
+    pool = await get_pool()
+    # No upper bound: forward returns of the last signals need the bars after ``end``
+    histories = await price_store.load_range_columns(pool, symbols, load_start)
+    if not histories:
+        return None
+    return build_panels(histories)
+
+
+async def run_backtest(
+    symbols: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    horizons=HORIZONS,
+    rule_set_name: str | None = None,
+) -> dict | None:
+    """Backtest the screening rules over daily_prices; None when there is no stored history."""
+    panels = await load_panels(symbols, start)
+    if panels is None:
+        return None
+    loaded, dates, (opens, highs, lows, closes) = panels
+    return await run_compute(
+        backtest_panel, loaded, dates, opens, highs, lows, closes, start, end, tuple(horizons), rule_set_name
+    )
@@ -0,0 +1,214 @@
+"""
+Candle Cache - memory-mapped daily OHLCV of the whole universe for screening reads.
+
+The latest CANDLE_CACHE_DAYS bars of every symbol are written as right-aligned
+(symbols, bars) .npy panels under CANDLE_CACHE_DIR and opened with
+np.load(mmap_mode="r"). Lookups return views into those mappings, so every
+worker process on the host reads the same OS page cache instead of querying
+Postgres. A build writes a fresh generation directory and switches it in by
+atomically replacing CURRENT; readers notice the switch with one stat() per
+lookup. Builds hold an exclusive lock on LOCK_FILE while writing, so workers
+sharing the directory never delete a generation another one is writing, and
+a build that finds a newer CURRENT under the lock discards its data.
+
+daily_prices events on the invalidation bus mark the cache stale. The next
+lookup rebuilds it from price_store, unless another worker has already built
+one that started after the change.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.core.constants import STOCK_LIST
+from app.core.invalidation import bus
+from app.core.metrics import registry
+from app.database import get_pool
+from app.services import price_store
+
+CURRENT = "CURRENT"
+LOCK_FILE = ".lock"
+PANEL_KEYS = ("date", "open", "high", "low", "close", "volume")
+_DTYPES = {"date": "datetime64[D]", "volume": np.int64}
+
+# Mapped generation: name, built_at, symbol index, bars per symbol and panels
+_mapped: dict = {"stamp": None, "generation": None, "built_at": 0.0}
+# time.time() of the last daily_prices change seen. Writes are announced on the
+# bus to every worker, so a generation built before this process started is
+# current until one arrives
+_stale_since = 0.0
+_build_lock = asyncio.Lock()
+_last_error: str | None = None
+
+build_failures_total = registry.counter(
+    "candle_cache_build_failures_total", "Candle cache builds that failed (screening reads fall back to the DB)"
+)
+
+
+def enabled() -> bool:
+    return bool(settings.CANDLE_CACHE_DIR)
+
+
+def _on_history_changed(key, data):
+    global _stale_since
+    _stale_since = time.time()
+
+
+bus.subscribe("daily_prices", _on_history_changed)
+
+
+def _current_path() -> str:
+    return os.path.join(settings.CANDLE_CACHE_DIR, CURRENT)
+
+
+def _read_current() -> dict | None:
+    try:
+        with open(_current_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_generation(columns_by_symbol: dict[str, dict], built_at: float) -> str:
+    """Write one generation of panels and make it CURRENT; returns the CURRENT generation."""
+    os.makedirs(settings.CANDLE_CACHE_DIR, exist_ok=True)
+    with open(os.path.join(settings.CANDLE_CACHE_DIR, LOCK_FILE), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        current = _read_current()
+        if current is not None and current.get("built_at", 0) >= built_at:
+            return current["generation"]  # Another worker built from newer data meanwhile
+        generation = _write_panels(columns_by_symbol, built_at)
+        # Nobody else writes while the lock is held. Older generations may still be
+        # mapped by readers; unlinking them is safe on POSIX
+        for name in os.listdir(settings.CANDLE_CACHE_DIR):
+            path = os.path.join(settings.CANDLE_CACHE_DIR, name)
+            if name != generation and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        return generation
+
+
+def _write_panels(columns_by_symbol: dict[str, dict], built_at: float) -> str:
+    """Write a generation directory and point CURRENT at it (LOCK_FILE held); returns its name."""
+    symbols = sorted(columns_by_symbol)
+    bars = settings.CANDLE_CACHE_DAYS
+    generation = f"{int(built_at * 1000)}-{os.getpid()}"
+    directory = os.path.join(settings.CANDLE_CACHE_DIR, generation)
+    os.makedirs(directory, exist_ok=True)
+
+    counts = np.zeros(len(symbols), dtype=np.int32)
+    for key in PANEL_KEYS:
+        dtype = _DTYPES.get(key, np.float64)
+        fill = np.datetime64("NaT") if key == "date" else 0 if key == "volume" else np.nan
+        panel = np.full((len(symbols), bars), fill, dtype=dtype)
+        for i, symbol in enumerate(symbols):
+            values = np.asarray(columns_by_symbol[symbol][key], dtype=dtype)[-bars:]
+            panel[i, bars - len(values) :] = values
+            counts[i] = len(values)
+        np.save(os.path.join(directory, f"{key}.npy"), panel)
+    np.save(os.path.join(directory, "bars.npy"), counts)
+    with open(os.path.join(directory, "symbols.json"), "w") as f:
+        json.dump(symbols, f)
+
+    fd, tmp = tempfile.mkstemp(dir=settings.CANDLE_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"generation": generation, "built_at": built_at}, f)
+    os.replace(tmp, _current_path())
+    return generation
+
+
+def _map_current() -> dict | None:
+    """The mapped CURRENT generation, remapped when CURRENT changed; None if there is none."""
+    try:
+        info = os.stat(_current_path())
+    except OSError:
+        return None
+    stamp = (info.st_ino, info.st_mtime_ns)
+    if stamp == _mapped["stamp"]:
+        return _mapped
+    current = _read_current()
+    if current is None:
+        return None
+    try:
+        directory = os.path.join(settings.CANDLE_CACHE_DIR, current["generation"])
+        with open(os.path.join(directory, "symbols.json")) as f:
+            symbols = json.load(f)
+        panels = {key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r") for key in PANEL_KEYS}
+        counts = np.load(os.path.join(directory, "bars.npy"))
+    except (OSError, ValueError, KeyError):
+        return None
+    _mapped.update(
+        stamp=stamp,
+        generation=current["generation"],
+        built_at=current["built_at"],
+        index={symbol: i for i, symbol in enumerate(symbols)},
+        bars=counts,
+        panels=panels,
+    )
+    return _mapped
+
+
+async def refresh(force: bool = False) -> bool:
+    """Rebuild the cache if it predates the last daily_prices change; True if usable afterwards."""
+    if not enabled():
+        return False
+    mapped = _map_current()
+    if not force and mapped is not None and mapped["built_at"] >= _stale_since:
+        return True
+    global _last_error
+    async with _build_lock:
+        mapped = _map_current()
+        if not force and mapped is not None and mapped["built_at"] >= _stale_since:
+            return True
+        # Stamped before reading so a change committed during the read keeps it stale
+        built_at = time.time()
+        try:
+            pool = await get_pool()
+            columns = await price_store.load_latest_columns(
+                pool, [stock["symbol"] for stock in STOCK_LIST], settings.CANDLE_CACHE_DAYS
+            )
+            await asyncio.to_thread(_write_generation, columns, built_at)
+        except Exception as e:
+            build_failures_total.inc()
+            _last_error = f"{type(e).__name__}: {str(e)[:100]}"
+            return False
+        _last_error = None
+    return _map_current() is not None
+
+
+def snapshot() -> dict:
+    mapped = _map_current() if enabled() else None
+    return {
+        "enabled": enabled(),
+        "generation": mapped["generation"] if mapped else None,
+        "built_at": mapped["built_at"] if mapped else None,
+        "stale": mapped is None or mapped["built_at"] < _stale_since,
+        "last_error": _last_error,
+    }
+
+
+async def get_columns(symbols: list[str], days: int) -> dict[str, dict[str, np.ndarray]]:
+    """Ascending column views of the latest ``days`` bars per cached symbol (no copies).
+
+    Symbols that are not cached are left out; so is everything when the cache
+    is disabled, unavailable or holds fewer than ``days`` bars per symbol.
+    """
+    if days > settings.CANDLE_CACHE_DAYS or not await refresh():
+        return {}
+    mapped = _mapped
+    width = mapped["panels"]["close"].shape[1]
+    if days > width:
+        return {}
+    result = {}
+    for symbol in symbols:
+        i = mapped["index"].get(symbol)
+        if i is None or not mapped["bars"][i]:
+            continue
+        start = width - min(int(mapped["bars"][i]), days)
+        result[symbol] = {key: panel[i, start:] for key, panel in mapped["panels"].items()}
+    return result
@@ -0,0 +1,47 @@
+"""
+Compute Pool - runs CPU-bound screening work off the asyncio event loop.
+
+The executor kind is chosen by settings.SCREENING_COMPUTE_EXECUTOR:
+  "process" - ProcessPoolExecutor (default, true parallelism, no GIL contention)
+  "thread"  - ThreadPoolExecutor (cheaper dispatch, still shares the GIL)
+  "inline"  - run on the event loop (previous behaviour, useful for debugging)
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import settings
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor | None:
+    """Get the shared compute executor (None when running inline)."""
+    global _executor
+    kind = settings.SCREENING_COMPUTE_EXECUTOR
+    if kind == "inline":
+        return None
+    if _executor is None:
+        workers = settings.SCREENING_COMPUTE_WORKERS
+        if kind == "thread":
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screening")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+async def run_compute(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` on the compute executor and await the result."""
+    executor = get_executor()
+    if executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Shut down the compute executor (called from app lifespan)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
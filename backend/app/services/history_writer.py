@@ -0,0 +1,134 @@
+"""
+History Writer - write-behind persistence of daily candles fetched from the API.
+
+A screening run that misses the DB used to await 200 upserts per symbol before
+computing anything. Now the candles go onto a bounded queue and a background
+task stores them: everything queued within HISTORY_WRITE_FLUSH_SECONDS (up to
+HISTORY_WRITE_BATCH_ROWS rows) is written in one COPY across symbols. When
+the queue is full or the writer is not running, submit() returns False and
+the caller saves inline, so backpressure never drops data. A batch whose COPY
+fails is retried HISTORY_WRITE_RETRIES times with backoff while new writes
+wait on the queue (and overflow to inline saves); only a batch that still
+fails then is dropped, counted as outcome="dropped". stop() flushes whatever
+is still queued or being retried (app shutdown).
+"""
+import asyncio
+import time
+
+from app.config import settings
+from app.core.metrics import registry
+from app.database import get_pool
+from app.services import price_store
+
+# First retry delay of a failed batch; doubles with each further attempt
+RETRY_BACKOFF_SECONDS = 1.0
+
+queue_depth = registry.gauge(
+    "history_write_queue_depth", "Symbols whose fetched candles are waiting to be stored"
+)
+write_lag = registry.gauge(
+    "history_write_lag_seconds", "Age of the oldest write in the last flushed batch when it was stored"
+)
+flush_duration = registry.histogram(
+    "history_write_flush_seconds", "Duration of one write-behind COPY batch"
+)
+rows_written_total = registry.counter(
+    "history_write_rows_total", "Candles handled by the write-behind queue", ("outcome",)
+)
+rejected_total = registry.counter(
+    "history_write_rejected_total", "Writes saved inline because the queue was full or stopped"
+)
+
+
+class HistoryWriter:
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        # Writes taken off the queue but not yet stored; stop() stores them if cancelled
+        self._batch: list[tuple] = []
+
+    def submit(self, symbol: str, rows: list[dict]) -> bool:
+        """Queue ``rows`` of ``symbol`` for storage; False if the caller must save them itself."""
+        if self._task is None or self._task.done():
+            rejected_total.inc()
+            return False
+        try:
+            # A copy: the live overlay appends today's partial candle to the caller's list
+            self._queue.put_nowait((symbol, list(rows), time.monotonic()))
+        except asyncio.QueueFull:
+            rejected_total.inc()
+            return False
+        queue_depth.set(self._queue.qsize())
+        return True
+
+    async def _fill_batch(self):
+        """Block for one write, then gather more until the batch is full or the flush interval ends."""
+        self._batch.append(await self._queue.get())
+        rows = len(self._batch[0][1])
+        deadline = time.monotonic() + settings.HISTORY_WRITE_FLUSH_SECONDS
+        while rows < settings.HISTORY_WRITE_BATCH_ROWS:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            self._batch.append(item)
+            rows += len(item[1])
+
+    async def _flush(self, batch: list[tuple]) -> bool:
+        histories: dict[str, list[dict]] = {}
+        for symbol, rows, _ in batch:
+            histories.setdefault(symbol, []).extend(rows)
+        count = sum(len(rows) for rows in histories.values())
+        started = time.monotonic()
+        try:
+            pool = await get_pool()
+            saved = await price_store.save_histories(pool, histories)
+        except Exception:
+            saved = False
+        flush_duration.observe(time.monotonic() - started)
+        write_lag.set(round(time.monotonic() - min(queued for _, _, queued in batch), 4))
+        # "failed" counts failed attempts; rows given up on are counted "dropped" by the caller
+        rows_written_total.inc(count, outcome="stored" if saved else "failed")
+        queue_depth.set(self._queue.qsize())
+        return saved
+
+    async def _run(self):
+        while True:
+            await self._fill_batch()
+            # A flush cancelled by stop() is rolled back and repeated there; upserts are idempotent
+            saved = await self._flush(self._batch)
+            for attempt in range(settings.HISTORY_WRITE_RETRIES):
+                if saved:
+                    break
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2**attempt)
+                saved = await self._flush(self._batch)
+            if not saved:
+                rows_written_total.inc(sum(len(rows) for _, rows, _ in self._batch), outcome="dropped")
+            self._batch = []
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=settings.HISTORY_WRITE_QUEUE_SIZE)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and store everything still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        batch, self._batch = self._batch, []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch and not await self._flush(batch):
+            rows_written_total.inc(sum(len(rows) for _, rows, _ in batch), outcome="dropped")
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,123 @@
+"""
+Vectorized Indicators - NumPy port of indicators.py over (symbols, bars) panels.
+
+Each row is one symbol's bar sequence, right-aligned: the row ends with its
+latest bar and is NaN-padded at the front when the symbol has fewer bars. Row
+values follow calculate_indicators exactly (same EMA seeding, same operation
+order), so results are bit-identical to the per-symbol Python implementation.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def ema_panel(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA per row, seeded with the mean of each row's first ``period`` valid values.
+
+    Time is iterated once; each step is a vector operation across all rows.
+    """
+    rows, bars = values.shape
+    out = np.full((rows, bars), np.nan)
+    count = np.zeros(rows, dtype=np.int64)
+    total = np.zeros(rows)
+    ema = np.full(rows, np.nan)
+    multiplier = 2 / (period + 1)
+    for t in range(bars):
+        column = values[:, t]
+        valid = ~np.isnan(column)
+        count += valid
+        seeding = valid & (count <= period)
+        total[seeding] += column[seeding]
+        ema = np.where(valid & (count == period), total / period, ema)
+        recursive = valid & (count > period)
+        ema = np.where(recursive, (column * multiplier) + (ema * (1 - multiplier)), ema)
+        out[:, t] = np.where(valid & (count >= period), ema, np.nan)
+    return out
+
+
+def macd_panel(closes: np.ndarray, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram per row (NaN where undefined)."""
+    macd = ema_panel(closes, fast) - ema_panel(closes, slow)
+    signal_line = ema_panel(macd, signal)
+    histogram = macd - signal_line
+    # calculate_macd returns nothing for sequences shorter than slow + signal
+    too_short = (np.count_nonzero(~np.isnan(closes), axis=1) < slow + signal)[:, None]
+    macd[np.broadcast_to(too_short, macd.shape)] = np.nan
+    signal_line[np.broadcast_to(too_short, signal_line.shape)] = np.nan
+    histogram[np.broadcast_to(too_short, histogram.shape)] = np.nan
+    return macd, signal_line, histogram
+
+
+def midpoint_panel(highs: np.ndarray, lows: np.ndarray, window: int) -> np.ndarray:
+    """(highest high + lowest low) / 2 over a trailing window; NaN until the window is full."""
+    out = np.full(highs.shape, np.nan)
+    if highs.shape[1] < window:
+        return out
+    highest = sliding_window_view(highs, window, axis=1).max(axis=2)
+    lowest = sliding_window_view(lows, window, axis=1).min(axis=2)
+    out[:, window - 1 :] = (highest + lowest) / 2
+    return out
+
+
+def ichimoku_panel(highs, lows, closes, tenkan=9, kijun=26, senkou_b=52):
+    tenkan_sen = midpoint_panel(highs, lows, tenkan)
+    kijun_sen = midpoint_panel(highs, lows, kijun)
+    return {
+        "tenkan_sen": tenkan_sen,
+        "kijun_sen": kijun_sen,
+        "senkou_span_a": (tenkan_sen + kijun_sen) / 2,
+        "senkou_span_b": midpoint_panel(highs, lows, senkou_b),
+        "chikou_span": closes.copy(),
+    }
+
+
+def indicator_panel(
+    opens,
+    highs,
+    lows,
+    closes,
+    macd_params: tuple[int, int, int] = (12, 26, 9),
+    ichimoku_params: tuple[int, int, int] = (9, 26, 52),
+) -> dict[str, np.ndarray]:
+    """All calculate_indicators fields as (symbols, bars) arrays."""
+    macd, signal_line, histogram = macd_panel(closes, *macd_params)
+    panel = {
+        "open": opens,
+        "high": highs,
+        "low": lows,
+        "close": closes,
+        "macd": macd,
+        "macd_signal": signal_line,
+        "macd_hist": histogram,
+    }
+    panel.update(ichimoku_panel(highs, lows, closes, *ichimoku_params))
+    return panel
+
+
+class PanelContext:
+    """Rule context over full panels: ``get(field, k)`` is the field k bars earlier.
+
+    ``price`` is the close, as a historical bar has no separate live price.
+    """
+
+    def __init__(self, panel: dict[str, np.ndarray]):
+        self.panel = panel
+
+    def get(self, name: str, offset: int) -> np.ndarray:
+        values = self.panel["close" if name == "price" else name]
+        if offset == 0:
+            return values
+        shifted = np.full(values.shape, np.nan)
+        if offset < values.shape[1]:
+            shifted[:, offset:] = values[:, :-offset]
+        return shifted
+
+
+def right_aligned(series: list[list[float]], bars: int | None = None) -> np.ndarray:
+    """Stack variable-length ascending sequences into a right-aligned NaN-padded panel."""
+    bars = bars if bars is not None else max((len(s) for s in series), default=0)
+    panel = np.full((len(series), bars), np.nan)
+    for i, values in enumerate(series):
+        values = values[-bars:] if bars else []
+        if len(values):
+            panel[i, bars - len(values) :] = values
+    return panel
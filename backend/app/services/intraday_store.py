@@ -0,0 +1,158 @@
+"""
+Intraday Store - 1-minute candles kept in intraday_prices instead of refetched per view.
+
+get_current_data() replaces direct UpstoxAPI.get_current_data calls. Only
+1-minute candles are fetched; other intervals are resampled from them
+locally (see resampler), so any screening interval costs no extra upstream
+call. The upstream intraday endpoint always returns the whole
+day, so it is called at most once per INTRADAY_REFRESH_SECONDS per symbol
+and worker. Only candles from the last stored timestamp on are written: the
+last one again, since it may still have been forming. Calls in between, and
+day-range reads, are served from the table. Each symbol's 3/5/15/30/60-minute
+bars are kept up to date incrementally as new minutes come in, next to a
+ring buffer of its minute bars (see minute_bars) holding the session OHLC.
+
+With the streaming market feed connected, ticks update the forming minute of
+symbols fetched this session, and calls within the refresh window are
+served from those bars: tick-fresh, and without a table read.
+
+intraday_prices is partitioned by IST trading day. Partitions are created on
+first write to a day, and days older than INTRADAY_RETENTION_DAYS are dropped
+when a new day's partition is created (and at startup).
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from app.config import settings
+from app.core.timezone import IST, now_ist
+from app.database import get_pool
+from app.repositories import intraday_repository
+from app.services.market_feed import market_feed
+from app.services.minute_bars import MinuteBars
+from app.services.resampler import TIMEFRAMES, IncrementalResampler, resample
+from app.services.upstox_api import UpstoxAPI
+
+# Days whose partition this worker has created or found
+_partitions: set[date] = set()
+# time.monotonic() of the last upstream fetch per symbol
+_fetched_at: dict[str, float] = {}
+# Per symbol: the session's minute bars and higher-timeframe bars, fed with every 1-minute list served
+_bars: dict[str, MinuteBars] = {}
+_resamplers: dict[str, IncrementalResampler] = {}
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, datetime.min.time(), IST)
+    return start, start + timedelta(days=1)
+
+
+async def apply_retention(pool=None) -> list[str]:
+    """Drop partitions older than INTRADAY_RETENTION_DAYS; returns their names."""
+    pool = pool or await get_pool()
+    cutoff = now_ist().date() - timedelta(days=settings.INTRADAY_RETENTION_DAYS)
+    return await intraday_repository.drop_partitions_before(pool, cutoff)
+
+
+async def _ensure_partitions(pool, days: set[date]) -> bool:
+    for day in sorted(days - _partitions):
+        if not await intraday_repository.ensure_partition(pool, day):
+            return False
+        if not _partitions or day > max(_partitions):
+            # First write of a new day: a good moment to expire old ones
+            await apply_retention(pool)
+        _partitions.add(day)
+    return True
+
+
+async def store_candles(pool, symbol: str, candles: list[dict]) -> bool:
+    """Write API-shaped candles newer than (or equal to) the last stored one for ``symbol``."""
+    parsed = [dict(c, ts=datetime.fromisoformat(c["datetime"])) for c in candles]
+    if not parsed:
+        return True
+    oldest = min(c["ts"] for c in parsed)
+    last = await intraday_repository.get_last_timestamp(pool, symbol, oldest)
+    new = [c for c in parsed if last is None or c["ts"] >= last]
+    if not await _ensure_partitions(pool, {c["ts"].astimezone(IST).date() for c in new}):
+        return False
+    return await intraday_repository.save_intraday(pool, symbol, new)
+
+
+async def _minute_candles(api: UpstoxAPI, symbol: str):
+    fetched = _fetched_at.get(symbol)
+    if fetched is not None and time.monotonic() - fetched < settings.INTRADAY_REFRESH_SECONDS:
+        bars = _bars.get(symbol)
+        if market_feed.streaming(symbol) and bars is not None and 0 < bars.count <= bars.capacity:
+            return bars.candles(), None
+        try:
+            pool = await get_pool()
+            stored = await intraday_repository.get_intraday(pool, symbol, *day_bounds(now_ist().date()))
+        except Exception:
+            stored = []
+        if stored:
+            return stored, None
+
+    candles, error = await api.get_current_data(symbol, interval_minutes=1)
+    if candles:
+        _fetched_at[symbol] = time.monotonic()
+        try:
+            pool = await get_pool()
+            await store_candles(pool, symbol, candles)
+        except Exception:
+            pass  # Storage is an optimisation; the fetched candles are still served
+    return candles, error
+
+
+def _ingest(symbol: str, candles: list[dict]):
+    """Feed the minutes of ``candles`` (newest first) not seen yet to the symbol's bars."""
+    bars = _bars.get(symbol)
+    if bars is None:
+        bars = _bars[symbol] = MinuteBars()
+        _resamplers[symbol] = IncrementalResampler()
+    resampler = _resamplers[symbol]
+    last = bars.last_ts
+    fresh = []
+    for candle in candles:
+        ts = int(datetime.fromisoformat(candle["datetime"]).timestamp())
+        if last is not None and ts < last:
+            break
+        fresh.append((ts, candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"]))
+    for minute in reversed(fresh):
+        bars.add(*minute)
+        resampler.add(*minute)
+
+
+def _on_tick(tick: dict):
+    """Market feed listener: fold a trade into the symbol's forming minute."""
+    bars = _bars.get(tick["symbol"])
+    if bars is None or not bars.count:
+        return  # Bars are seeded by a fetch of the whole day first
+    if bars.apply_tick(tick["ltt"] // 1000, tick["ltp"], tick["ltq"]):
+        _resamplers[tick["symbol"]].add(*bars.last())
+
+
+market_feed.add_listener(_on_tick)
+
+
+def session_ohlc(symbol: str) -> tuple[float, float, float, float] | None:
+    """(current, high, low, open) of the latest session served for ``symbol``."""
+    bars = _bars.get(symbol)
+    return bars.session() if bars is not None else None
+
+
+async def get_current_data(api: UpstoxAPI, symbol: str, interval_minutes: int = 1):
+    """Today's candles, newest first, and an error message (as UpstoxAPI.get_current_data)."""
+    candles, error = await _minute_candles(api, symbol)
+    if not candles:
+        return candles, error
+    _ingest(symbol, candles)
+    if interval_minutes <= 1:
+        return candles, error
+    if interval_minutes in TIMEFRAMES:
+        return _resamplers[symbol].candles(interval_minutes), error
+    return resample(candles, interval_minutes), error
+
+
+async def get_range(symbol: str, start: date, end: date) -> list[dict]:
+    """Stored 1-minute candles of the IST days [start, end], newest first."""
+    pool = await get_pool()
+    return await intraday_repository.get_intraday(pool, symbol, day_bounds(start)[0], day_bounds(end)[1])
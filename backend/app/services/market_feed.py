@@ -0,0 +1,239 @@
+"""
+Market Feed - streaming ticks over a WebSocket, fanned out to in-process subscribers.
+
+MarketFeed keeps one connection to MARKET_FEED_URL per worker. It subscribes
+to instrument keys (``NSE_EQ|<ISIN>``) and decodes each frame into ticks:
+
+    {"instrument_key", "symbol", "ltp", "ltt" (epoch ms), "ltq", "cp"}
+
+Each tick is handed to every listener (a plain callback, e.g. intraday_store
+updating the session's minute bars) and to every stream() consumer (e.g. SSE
+responses). A listener that raises never affects the others. Each stream has
+a bounded queue, and a slow consumer loses its oldest ticks rather than
+stalling the feed. When the connection drops, the feed reconnects with
+backoff and resubscribes every key.
+
+The wire format is a codec passed to the constructor: ``encode(method, keys)``
+builds subscription messages and ``decode(frame, symbols)`` turns a frame into
+ticks. The default codec is the JSON protocol of app.services.mock_feed, which
+borrows the field names of the broker's "ltpc" mode:
+
+    -> {"guid": ..., "method": "sub" | "unsub", "data": {"mode": "ltpc", "instrumentKeys": [...]}}
+    <- {"type": "live_feed", "currentTs": ms, "feeds": {key: {"ltpc": {"ltp", "ltt", "ltq", "cp"}}}}
+
+It is not the broker's protocol: the broker's v3 feed authorizes over REST,
+redirects to a per-session socket URL and sends protobuf frames, which needs
+a codec and connect step of its own. Until then the feed is for development
+and load tests against mock_feed. Frames the codec cannot decode are counted
+and reported as last_error in snapshot(), so a wrong URL does not fail silently.
+"""
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+
+import websockets
+
+from app.config import settings
+from app.core.metrics import registry
+
+FEED_MODE = "ltpc"
+STREAM_QUEUE_SIZE = 1000
+MAX_RECONNECT_SECONDS = 30.0
+
+ticks_total = registry.counter("market_feed_ticks_total", "Ticks decoded from the market feed")
+reconnects_total = registry.counter("market_feed_reconnects_total", "Market feed connections (re)established")
+undecodable_total = registry.counter(
+    "market_feed_undecodable_frames_total", "Frames the market feed codec could not decode"
+)
+dropped_total = registry.counter(
+    "market_feed_dropped_total", "Ticks dropped because a stream consumer fell behind"
+)
+connected_gauge = registry.gauge("market_feed_connected", "1 while the market feed is connected")
+
+
+def instrument_key(isin: str) -> str:
+    return f"NSE_EQ|{isin}"
+
+
+def subscription_message(method: str, keys: list[str]) -> str:
+    return json.dumps(
+        {"guid": uuid.uuid4().hex, "method": method, "data": {"mode": FEED_MODE, "instrumentKeys": keys}}
+    )
+
+
+def decode_message(raw: str | bytes, symbols: dict[str, str]) -> list[dict]:
+    """Ticks of one JSON feed frame; frames other than live_feed, and unknown keys, yield none.
+
+    Raises ValueError for frames that are not JSON objects.
+    """
+    message = json.loads(raw)
+    if not isinstance(message, dict):
+        raise ValueError(f"expected a JSON object, got {type(message).__name__}")
+    if message.get("type") != "live_feed":
+        return []
+    ticks = []
+    for key, feed in (message.get("feeds") or {}).items():
+        ltpc = feed.get("ltpc") if isinstance(feed, dict) else None
+        symbol = symbols.get(key)
+        if not ltpc or symbol is None:
+            continue
+        try:
+            ticks.append(
+                {
+                    "instrument_key": key,
+                    "symbol": symbol,
+                    "ltp": float(ltpc["ltp"]),
+                    "ltt": int(ltpc["ltt"]),
+                    "ltq": int(ltpc.get("ltq") or 0),
+                    "cp": float(ltpc["cp"]) if ltpc.get("cp") is not None else None,
+                }
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    return ticks
+
+
+class MarketFeed:
+    def __init__(self, url: str | None = None, encode=subscription_message, decode=decode_message):
+        self.url = url
+        self._encode = encode
+        self._decode = decode
+        # Subscribed instrument key -> symbol
+        self._symbols: dict[str, str] = {}
+        self._subscribed: set[str] = set()
+        self._listeners: list = []
+        # stream() queues and the symbols each wants (None: all)
+        self._streams: dict[asyncio.Queue, set[str] | None] = {}
+        self._connection = None
+        self._task: asyncio.Task | None = None
+        self._last_error: str | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    def streaming(self, symbol: str) -> bool:
+        """True while ``symbol``'s ticks are arriving over a live connection."""
+        return self.connected and symbol in self._subscribed
+
+    def add_listener(self, callback):
+        """Run ``callback(tick)`` for every tick."""
+        self._listeners.append(callback)
+
+    async def subscribe(self, symbols: dict[str, str]):
+        """Subscribe {instrument_key: symbol}; kept across reconnects."""
+        new = [key for key in symbols if key not in self._symbols]
+        self._symbols.update(symbols)
+        self._subscribed = set(self._symbols.values())
+        if new:
+            await self._send("sub", new)
+
+    async def unsubscribe(self, keys: list[str]):
+        keys = [key for key in keys if self._symbols.pop(key, None) is not None]
+        self._subscribed = set(self._symbols.values())
+        if keys:
+            await self._send("unsub", keys)
+
+    async def _send(self, method: str, keys: list[str]):
+        connection = self._connection
+        if connection is None:
+            return  # Sent with the full key set on (re)connect
+        try:
+            await connection.send(self._encode(method, keys))
+        except websockets.ConnectionClosed:
+            pass  # The reconnect resubscribes
+
+    def _dispatch(self, ticks: list[dict]):
+        for tick in ticks:
+            for callback in self._listeners:
+                try:
+                    callback(tick)
+                except Exception:
+                    pass
+            for queue, wanted in self._streams.items():
+                if wanted is not None and tick["symbol"] not in wanted:
+                    continue
+                if queue.full():
+                    queue.get_nowait()
+                    dropped_total.inc()
+                queue.put_nowait(tick)
+        ticks_total.inc(len(ticks))
+
+    @asynccontextmanager
+    async def stream(self, symbols: set[str] | None = None, idle_timeout: float | None = None):
+        """Async iterator of ticks (only of ``symbols`` if given) for the life of the context.
+
+        With ``idle_timeout`` it yields None after that many seconds without a
+        tick, so that consumers can send keepalives.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self._streams[queue] = symbols
+
+        async def ticks():
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+
+        try:
+            yield ticks()
+        finally:
+            self._streams.pop(queue, None)
+
+    async def _run(self):
+        backoff = 0.5
+        while True:
+            try:
+                async with websockets.connect(self.url, max_queue=None) as connection:
+                    # Published first, so keys subscribed meanwhile are sent too (twice at worst)
+                    self._connection = connection
+                    if self._symbols:
+                        await connection.send(self._encode("sub", list(self._symbols)))
+                    connected_gauge.set(1)
+                    reconnects_total.inc()
+                    backoff = 0.5
+                    async for raw in connection:
+                        try:
+                            ticks = self._decode(raw, self._symbols)
+                        except ValueError as e:
+                            undecodable_total.inc()
+                            self._last_error = f"Undecodable frame: {str(e)[:100]}"
+                            continue
+                        self._dispatch(ticks)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._last_error = f"{type(e).__name__}: {str(e)[:100]}"
+            finally:
+                self._connection = None
+                connected_gauge.set(0)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_RECONNECT_SECONDS)
+
+    def start(self):
+        self.url = self.url or settings.MARKET_FEED_URL
+        if self._task is None and self.url:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": bool(self.url),
+            "connected": self.connected,
+            "instruments": len(self._symbols),
+            "streams": len(self._streams),
+            "last_error": self._last_error,
+        }
+
+
+market_feed = MarketFeed()
@@ -0,0 +1,150 @@
+"""
+Minute Bars - fixed-capacity ring buffer of one symbol's 1-minute bars for the session.
+
+Bars live in preallocated NumPy columns, so a symbol costs the same memory
+from 09:15 to 15:30: SESSION_MINUTES bars of 48 bytes, about 18 KB, or
+36 MB for a 2,000-symbol universe. append() and update_last() are O(1)
+and keep the session open, high, low and volume current, so the live
+overlay reads them without scanning or sorting candles. When more bars
+arrive than fit (pre-open or extended sessions), the oldest are overwritten;
+the session aggregates still cover every bar seen.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from app.core.timezone import IST
+
+# 09:15 to 15:30 IST
+SESSION_MINUTES = 375
+
+
+class MinuteBars:
+    __slots__ = (
+        "capacity", "count", "_head",
+        "ts", "open", "high", "low", "close", "volume",
+        "day", "session_open", "session_high", "session_low", "session_volume",
+        "_prior_high", "_prior_low", "_prior_volume",
+    )
+
+    def __init__(self, capacity: int = SESSION_MINUTES):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._head = 0  # Slot the next bar is written to
+        self.day = None
+        self.session_open = self.session_high = self.session_low = None
+        self.session_volume = 0
+        # Aggregates of every bar but the last, so that update_last() stays O(1)
+        self._prior_high = -np.inf
+        self._prior_low = np.inf
+        self._prior_volume = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def last_ts(self) -> int | None:
+        return int(self.ts[self._head - 1]) if self.count else None
+
+    @property
+    def last_close(self) -> float | None:
+        return float(self.close[self._head - 1]) if self.count else None
+
+    def _write(self, slot: int, ts: int, o, h, l, c, v):
+        self.ts[slot] = ts
+        self.open[slot] = o
+        self.high[slot] = h
+        self.low[slot] = l
+        self.close[slot] = c
+        self.volume[slot] = v
+        self.session_high = max(self._prior_high, h)
+        self.session_low = min(self._prior_low, l)
+        self.session_volume = self._prior_volume + v
+
+    def append(self, ts: int, o: float, h: float, l: float, c: float, v: int):
+        """Add the next minute; a bar from a new IST day starts a new session."""
+        day = datetime.fromtimestamp(ts, IST).date()
+        if day != self.day:
+            self.reset()
+            self.day = day
+            self.session_open = o
+        elif self.count:
+            self._prior_high = self.session_high
+            self._prior_low = self.session_low
+            self._prior_volume = self.session_volume
+        self._write(self._head, ts, o, h, l, c, v)
+        self._head = (self._head + 1) % self.capacity
+        self.count += 1
+
+    def update_last(self, o: float, h: float, l: float, c: float, v: int):
+        """Replace the last (still forming) minute."""
+        if self.count == 1:
+            self.session_open = o
+        self._write(self._head - 1, int(self.ts[self._head - 1]), o, h, l, c, v)
+
+    def add(self, ts: int, o: float, h: float, l: float, c: float, v: int) -> bool:
+        """append() or update_last() as ``ts`` is new or the last minute; False for older bars."""
+        last = self.last_ts
+        if last is not None and ts < last:
+            return False
+        if ts == last:
+            self.update_last(o, h, l, c, v)
+        else:
+            self.append(ts, o, h, l, c, v)
+        return True
+
+    def last(self) -> tuple | None:
+        """(ts, open, high, low, close, volume) of the last minute."""
+        if not self.count:
+            return None
+        i = self._head - 1
+        return (
+            int(self.ts[i]), float(self.open[i]), float(self.high[i]),
+            float(self.low[i]), float(self.close[i]), int(self.volume[i]),
+        )
+
+    def apply_tick(self, ts: int, price: float, quantity: int) -> bool:
+        """Fold a trade at ``ts`` (epoch seconds) into its minute; False if that minute is past."""
+        minute = ts - ts % 60
+        last = self.last()
+        if last is not None and minute < last[0]:
+            return False
+        if last is not None and minute == last[0]:
+            _, o, h, l, _, v = last
+            self.update_last(o, max(h, price), min(l, price), price, v + quantity)
+        else:
+            self.append(minute, price, price, price, price, quantity)
+        return True
+
+    def candles(self) -> list[dict]:
+        """The retained minutes in the API shape, newest first."""
+        order = (self._head - 1 - np.arange(len(self))) % self.capacity
+        return [
+            {
+                "datetime": datetime.fromtimestamp(ts, IST).isoformat(),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for ts, o, h, l, c, v in zip(
+                self.ts[order].tolist(), self.open[order].tolist(), self.high[order].tolist(),
+                self.low[order].tolist(), self.close[order].tolist(), self.volume[order].tolist(),
+            )
+        ]
+
+    def session(self) -> tuple[float, float, float, float] | None:
+        """(current, high, low, open) of the session so far, as apply_live_overlay uses them."""
+        if not self.count:
+            return None
+        return self.last_close, float(self.session_high), float(self.session_low), float(self.session_open)
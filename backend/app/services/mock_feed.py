@@ -0,0 +1,108 @@
+"""
+Mock Feed - local stand-in for the broker's market-data WebSocket.
+
+Speaks market_feed's default JSON codec: clients send sub/unsub messages and
+receive live_feed frames. Every ``interval`` seconds, each client gets one
+frame with a tick for every instrument it subscribed to. Prices random-walk
+from a start price derived from the instrument key, so runs are
+reproducible. Run it and point the backend at it:
+
+    python -m app.services.mock_feed --port 8765 --interval 0.25
+    MARKET_FEED_URL=ws://127.0.0.1:8765 uvicorn app.main:app
+
+For load tests, raise the rate (--interval 0.01) or connect several workers.
+--drop-after N closes every connection after N seconds, to exercise the
+client's reconnect and resubscribe path.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import zlib
+
+import websockets
+
+
+class MockFeedServer:
+    def __init__(self, interval: float = 0.25, drop_after: float | None = None):
+        self.interval = interval
+        self.drop_after = drop_after
+        self._prices: dict[str, float] = {}
+        self._closes: dict[str, float] = {}
+        self.connections = 0
+
+    def _tick(self, key: str) -> dict:
+        price = self._prices.get(key)
+        if price is None:
+            seed = zlib.crc32(key.encode())
+            price = self._closes[key] = round(100 + seed % 3000, 2)
+        price = round(max(0.05, price * (1 + random.gauss(0, 0.0005))), 2)
+        self._prices[key] = price
+        return {
+            "ltpc": {
+                "ltp": price,
+                "ltt": str(int(time.time() * 1000)),
+                "ltq": str(random.randint(1, 500)),
+                "cp": self._closes[key],
+            }
+        }
+
+    async def _receive(self, connection, keys: set[str]):
+        async for raw in connection:
+            try:
+                message = json.loads(raw)
+                requested = message["data"]["instrumentKeys"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if message.get("method") == "sub":
+                keys.update(requested)
+            elif message.get("method") == "unsub":
+                keys.difference_update(requested)
+
+    async def handler(self, connection):
+        self.connections += 1
+        keys: set[str] = set()
+        receiver = asyncio.create_task(self._receive(connection, keys))
+        opened = time.monotonic()
+        try:
+            while not receiver.done():
+                if self.drop_after is not None and time.monotonic() - opened >= self.drop_after:
+                    break
+                if keys:
+                    frame = {
+                        "type": "live_feed",
+                        "currentTs": str(int(time.time() * 1000)),
+                        "feeds": {key: self._tick(key) for key in list(keys)},
+                    }
+                    await connection.send(json.dumps(frame))
+                await asyncio.sleep(self.interval)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            receiver.cancel()
+            await connection.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """Serve until cancelled."""
+        async with websockets.serve(self.handler, host, port):
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.25, help="seconds between frames")
+    parser.add_argument("--drop-after", type=float, default=None, help="close connections after N seconds")
+    args = parser.parse_args()
+    server = MockFeedServer(args.interval, args.drop_after)
+    print(f"Mock market feed on ws://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Parameter Sweep - ranks MACD / Ichimoku period combinations with the backtest engine.
+
+The price panels are copied once into shared memory. Sweep worker processes
+attach to them at start-up, so each combination costs one backtest_panel call
+without pickling the matrices per task. Results are cached on disk per
+(data version, parameters, evaluation settings) when SWEEP_CACHE_DIR is set:
+rerunning a sweep over unchanged data only computes combinations that were
+not evaluated before.
+Sweeps take turns (MAX_CONCURRENT_SWEEPS), so concurrent requests never run
+more than SWEEP_WORKERS sweep processes per app worker.
+
+Only the indicator periods vary; rule offsets (the [26] displacement) stay as
+written in the rule set.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.config import settings
+from app.core.metrics import registry
+from app.services.backtest import HORIZONS, backtest_panel, load_panels
+from app.services.rules import RULE_SETS
+
+MAX_COMBINATIONS = 500
+MAX_CONCURRENT_SWEEPS = 1
+METRICS = ("hit_rate", "mean_return", "excess_return", "count")
+PANEL_KEYS = ("dates", "open", "high", "low", "close")
+
+cache_write_failures_total = registry.counter(
+    "sweep_cache_write_failures_total", "Sweep results that could not be written to SWEEP_CACHE_DIR"
+)
+
+# Worker-side views of the shared panels (set by _attach in each sweep process)
+_shared: dict = {}
+# Each sweep starts its own pool, whose workers attach to that sweep's panels
+_sweep_slots = asyncio.Semaphore(MAX_CONCURRENT_SWEEPS)
+
+
+class SharedPanels:
+    """Named shared-memory copies of the price panels; ``spec`` lets workers attach."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.blocks: dict[str, shared_memory.SharedMemory] = {}
+        self.spec: dict[str, tuple] = {}
+        for key, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks[key] = block
+            self.spec[key] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+
+def _attach(spec: dict, symbols: list[str]):
+    """Process-pool initializer: map the shared panels into this worker."""
+    for key, (name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=name)
+        # Keep the block referenced so the mapping outlives this function
+        _shared[key] = (block, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+    _shared["symbols"] = symbols
+
+
+def _evaluate(macd_params, ichimoku_params, start, end, horizons, rule_set_name) -> dict:
+    dates, opens, highs, lows, closes = (_shared[key][1] for key in PANEL_KEYS)
+    return backtest_panel(
+        _shared["symbols"],
+        dates,
+        opens,
+        highs,
+        lows,
+        closes,
+        start,
+        end,
+        horizons,
+        rule_set_name,
+        macd_params,
+        ichimoku_params,
+    )
+
+
+def parameter_grid(fast, slow, signal, tenkan, kijun, senkou_b) -> list[tuple[tuple, tuple]]:
+    """Valid (macd_params, ichimoku_params) combinations: fast < slow and tenkan < kijun < senkou_b."""
+    macd = [(f, s, g) for f, s, g in itertools.product(fast, slow, signal) if f < s]
+    ichimoku = [(t, k, b) for t, k, b in itertools.product(tenkan, kijun, senkou_b) if t < k < b]
+    return list(itertools.product(macd, ichimoku))
+
+
+def data_version(symbols: list[str], arrays: dict[str, np.ndarray]) -> str:
+    """Content hash of the loaded panels; changes whenever stored history changes."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(symbols).encode())
+    for key in PANEL_KEYS:
+        digest.update(np.ascontiguousarray(arrays[key]).tobytes())
+    return digest.hexdigest()
+
+
+def _combo_key(macd_params, ichimoku_params, start, end, horizons, rule_set_name) -> str:
+    raw = json.dumps(
+        [macd_params, ichimoku_params, start, end, list(horizons), RULE_SETS[rule_set_name]],
+        sort_keys=True,
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def _cache_path(version: str, key: str) -> str:
+    return os.path.join(settings.SWEEP_CACHE_DIR, version, f"{key}.json")
+
+
+def _read_cached(version: str, key: str) -> dict | None:
+    if not settings.SWEEP_CACHE_DIR:
+        return None
+    try:
+        with open(_cache_path(version, key)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cached(version: str, key: str, result: dict) -> bool:
+    """Store one result; False only if the write failed (a disabled cache is not a failure)."""
+    if not settings.SWEEP_CACHE_DIR:
+        return True
+    path = _cache_path(version, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+        return True
+    except OSError:
+        cache_write_failures_total.inc()
+        return False
+
+
+def _split_cached(grid, version, start, end, horizons, rule_set_name):
+    """Cached results by combination, and (key, macd, ichimoku) of the combinations to compute."""
+    results, pending = {}, []
+    for macd_params, ichimoku_params in grid:
+        key = _combo_key(macd_params, ichimoku_params, start, end, horizons, rule_set_name)
+        cached = _read_cached(version, key)
+        if cached is not None:
+            results[(macd_params, ichimoku_params)] = cached
+        else:
+            pending.append((key, macd_params, ichimoku_params))
+    return results, pending
+
+
+def score(result: dict, metric: str, trend: str, horizon: int, min_signals: int = 0) -> float | None:
+    """Ranking value of one backtest result; None when the trend has too few signals.
+
+    Return metrics are signed by the trend's direction, so for Bearish a falling
+    price scores positive. ``excess_return`` is measured against the mean forward
+    return of all classified bars.
+    """
+    entry = result["signals"].get(trend)
+    stats = entry["forward"].get(str(horizon)) if entry else None
+    if not stats or not stats["count"] or stats["count"] < min_signals:
+        return None
+    direction = entry["direction"] or 1
+    if metric == "count":
+        return float(stats["count"])
+    if metric == "hit_rate":
+        return stats["hit_rate"]
+    if metric == "mean_return":
+        return direction * stats["mean_return"]
+    baseline = result["baseline"][str(horizon)]["mean_return"] or 0.0
+    return direction * (stats["mean_return"] - baseline)
+
+
+async def run_sweep(
+    grid: list[tuple[tuple, tuple]],
+    start: str | None = None,
+    end: str | None = None,
+    horizons=HORIZONS,
+    rule_set_name: str | None = None,
+    metric: str = "hit_rate",
+    trend: str = "Bullish",
+    horizon: int = 5,
+    top: int = 10,
+    min_signals: int = 30,
+    symbols: list[str] | None = None,
+) -> dict | None:
+    """Evaluate every grid combination (cached ones are reused) and rank them."""
+    started = time.perf_counter()
+    rule_set_name = rule_set_name or settings.SCREENING_RULE_SET
+    if rule_set_name not in RULE_SETS:
+        raise KeyError(f"Unknown rule set {rule_set_name!r}")
+    horizons = tuple(sorted(set(horizons) | {horizon}))
+
+    panels = await load_panels(symbols, start)
+    if panels is None:
+        return None
+    loaded, dates, (opens, highs, lows, closes) = panels
+    arrays = {"dates": dates, "open": opens, "high": highs, "low": lows, "close": closes}
+    version = await asyncio.to_thread(data_version, loaded, arrays)
+
+    # File reads and writes stay off the event loop, like hashing the panels
+    results, pending = await asyncio.to_thread(
+        _split_cached, grid, version, start, end, horizons, rule_set_name
+    )
+    cache_failures = 0
+
+    if pending:
+        async with _sweep_slots:
+            shared = SharedPanels(arrays)
+            executor = ProcessPoolExecutor(
+                max_workers=max(1, min(settings.SWEEP_WORKERS, len(pending))),
+                initializer=_attach,
+                initargs=(shared.spec, loaded),
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                outcomes = await asyncio.gather(
+                    *(
+                        loop.run_in_executor(
+                            executor, _evaluate, macd_params, ichimoku_params, start, end, horizons, rule_set_name
+                        )
+                        for _, macd_params, ichimoku_params in pending
+                    )
+                )
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+                shared.close()
+        written = await asyncio.to_thread(
+            lambda: [_write_cached(version, key, result) for (key, _, _), result in zip(pending, outcomes)]
+        )
+        cache_failures = written.count(False)
+        for (_, macd_params, ichimoku_params), result in zip(pending, outcomes):
+            results[(macd_params, ichimoku_params)] = result
+
+    ranked = []
+    for (macd_params, ichimoku_params), result in results.items():
+        value = score(result, metric, trend, horizon, min_signals)
+        if value is None:
+            continue
+        stats = result["signals"][trend]["forward"][str(horizon)]
+        ranked.append(
+            {
+                "macd": list(macd_params),
+                "ichimoku": list(ichimoku_params),
+                "score": round(value, 6),
+                "count": stats["count"],
+                "hit_rate": stats["hit_rate"],
+                "mean_return": stats["mean_return"],
+                "turnover": result["turnover"]["mean_daily"],
+            }
+        )
+    ranked.sort(key=lambda item: item["score"], reverse=True)
+
+    return {
+        "data_version": version,
+        "combinations": len(grid),
+        "computed": len(pending),
+        "cached": len(grid) - len(pending),
+        "cache_write_failures": cache_failures,
+        "ranked": len(ranked),
+        "metric": metric,
+        "trend": trend,
+        "horizon": horizon,
+        "top": ranked[:top],
+        "elapsed": round(time.perf_counter() - started, 4),
+    }
@@ -0,0 +1,91 @@
+"""
+Price Store - daily candle reads and writes in the configured storage layout.
+
+daily_prices (one row per symbol and day) is always written and stays the
+source of truth. With PRICE_STORAGE_LAYOUT = "blocks" each write also rebuilds
+the touched yearly blocks of daily_price_blocks, and reads come from those
+blocks: a 200-bar lookup reads one or two rows per symbol, whose arrays are
+decoded straight into NumPy columns instead of one asyncpg record per bar.
+"""
+from datetime import date
+
+import numpy as np
+
+from app.config import settings
+from app.database import get_pool
+from app.repositories import price_block_repository, price_repository
+from app.repositories.price_repository import as_date
+
+PRICE_COLUMNS = ("date", "open", "high", "low", "close", "volume")
+
+
+def use_blocks() -> bool:
+    return settings.PRICE_STORAGE_LAYOUT == "blocks"
+
+
+def rows_from_columns(columns: dict[str, np.ndarray]) -> list[dict]:
+    """Descending candle dicts (as get_historical_data_bulk returns them) from ascending arrays."""
+    values = [columns[key][::-1].tolist() for key in PRICE_COLUMNS]
+    return [dict(zip(PRICE_COLUMNS, row)) for row in zip(*values)]
+
+
+def _columns_from_rows(rows_desc: list[dict]) -> dict[str, list]:
+    rows_asc = rows_desc[::-1]
+    return {key: [row[key] for row in rows_asc] for key in PRICE_COLUMNS}
+
+
+async def save_history(pool, symbol: str, rows: list[dict]) -> bool:
+    """Upsert daily candles for ``symbol``, keeping the block layout in sync when enabled."""
+    saved = await price_repository.save_historical_data(pool, symbol, rows)
+    if saved and rows and use_blocks():
+        since = min(as_date(row["date"]) for row in rows)
+        await price_block_repository.refresh_blocks(pool, [symbol], since)
+    return saved
+
+
+async def save_histories(pool, histories: dict[str, list[dict]]) -> bool:
+    """Bulk version of save_history: one COPY for all symbols' candles."""
+    saved = await price_repository.copy_historical_data(pool, histories)
+    if saved and use_blocks():
+        dates = [as_date(row["date"]) for rows in histories.values() for row in rows]
+        if dates:
+            await price_block_repository.refresh_blocks(pool, list(histories), min(dates))
+    return saved
+
+
+async def load_latest(pool, symbols: list[str], days: int, as_of: date | str | None = None) -> dict[str, list[dict]]:
+    """The latest ``days`` candles per symbol, descending: {symbol: rows_desc}."""
+    if not use_blocks():
+        return await price_repository.get_historical_data_bulk(pool, symbols, days, as_of)
+    arrays = await price_block_repository.get_latest_arrays(pool, symbols, days, as_date(as_of))
+    return {symbol: rows_from_columns(columns) for symbol, columns in arrays.items()}
+
+
+async def load_latest_columns(
+    pool, symbols: list[str], days: int, as_of: date | str | None = None
+) -> dict[str, dict]:
+    """Like load_latest, as ascending columns (NumPy arrays with the block layout)."""
+    if use_blocks():
+        return await price_block_repository.get_latest_arrays(pool, symbols, days, as_date(as_of))
+    histories = await price_repository.get_historical_data_bulk(pool, symbols, days, as_of)
+    return {symbol: _columns_from_rows(rows) for symbol, rows in histories.items()}
+
+
+async def load_range_columns(
+    pool, symbols: list[str], start: date | str | None = None, end: date | str | None = None
+) -> dict[str, dict]:
+    """Every candle in [start, end] per symbol as ascending columns."""
+    if use_blocks():
+        return await price_block_repository.get_range_arrays(pool, symbols, as_date(start), as_date(end))
+    return await price_repository.get_price_panel(pool, symbols, start, end)
+
+
+async def sync_blocks() -> int:
+    """Rebuild the blocks of symbols written while the row layout was active (app startup)."""
+    if not use_blocks():
+        return 0
+    pool = await get_pool()
+    stale = await price_block_repository.get_stale_symbols(pool)
+    if stale:
+        await price_block_repository.refresh_blocks(pool, stale)
+    return len(stale)
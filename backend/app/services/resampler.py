@@ -0,0 +1,124 @@
+"""
+Resampler - higher-timeframe intraday bars built locally from 1-minute candles.
+
+Bars are aligned to the NSE session open (09:15 IST): a 60-minute bar covers
+09:15-10:14, the next 10:15-11:14, and so on, matching the broker's own
+bucketing. resample() aggregates a whole day with NumPy reductions and works
+for any interval. IncrementalResampler keeps the TIMEFRAMES bars of one symbol
+up to date as minutes arrive: a new minute extends or opens a bar in O(1),
+and a revised last minute (the candle still forming) rebuilds only the
+current bar.
+
+Candles use the API shape: {"datetime": ISO string, "open", "high", "low",
+"close", "volume"}.
+"""
+from datetime import datetime, time as clock
+
+import numpy as np
+
+from app.core.timezone import IST
+
+TIMEFRAMES = (3, 5, 15, 30, 60)
+SESSION_OPEN = clock(9, 15)
+
+
+def _session_anchor(ts: float) -> int:
+    """Epoch seconds of 09:15 IST on the day of ``ts``."""
+    day = datetime.fromtimestamp(ts, IST).date()
+    return int(datetime.combine(day, SESSION_OPEN, IST).timestamp())
+
+
+def _candle(ts: int, o, h, l, c, v) -> dict:
+    return {
+        "datetime": datetime.fromtimestamp(ts, IST).isoformat(),
+        "open": o,
+        "high": h,
+        "low": l,
+        "close": c,
+        "volume": v,
+    }
+
+
+def resample(candles_desc: list[dict], minutes: int) -> list[dict]:
+    """Aggregate one day's 1-minute candles (newest first) into ``minutes`` bars, newest first."""
+    if minutes <= 1 or not candles_desc:
+        return candles_desc
+    rows = candles_desc[::-1]
+    ts = np.array([datetime.fromisoformat(c["datetime"]).timestamp() for c in rows], dtype=np.int64)
+    opens = np.array([c["open"] for c in rows], dtype=float)
+    highs = np.array([c["high"] for c in rows], dtype=float)
+    lows = np.array([c["low"] for c in rows], dtype=float)
+    closes = np.array([c["close"] for c in rows], dtype=float)
+    volumes = np.array([c["volume"] for c in rows], dtype=np.int64)
+
+    anchor = _session_anchor(int(ts[0]))
+    buckets = (ts - anchor) // (minutes * 60)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(ts)])) - 1
+    bars = zip(
+        (anchor + buckets[starts] * minutes * 60).tolist(),
+        opens[starts].tolist(),
+        np.maximum.reduceat(highs, starts).tolist(),
+        np.minimum.reduceat(lows, starts).tolist(),
+        closes[ends].tolist(),
+        np.add.reduceat(volumes, starts).tolist(),
+    )
+    return [_candle(*bar) for bar in bars][::-1]
+
+
+class IncrementalResampler:
+    """One symbol's TIMEFRAMES bars for the current session, updated minute by minute."""
+
+    __slots__ = ("anchor", "last_ts", "bars", "_forming")
+
+    def __init__(self):
+        self.anchor: int | None = None
+        self.last_ts: int | None = None
+        # Per timeframe: bars as [start_ts, open, high, low, close, volume], oldest first
+        self.bars: dict[int, list[list]] = {m: [] for m in TIMEFRAMES}
+        # Per timeframe: the 1-minute rows of the bar still forming
+        self._forming: dict[int, list[tuple]] = {m: [] for m in TIMEFRAMES}
+
+    def reset(self):
+        self.anchor = self.last_ts = None
+        for m in TIMEFRAMES:
+            self.bars[m] = []
+            self._forming[m] = []
+
+    def add(self, ts: int, o: float, h: float, l: float, c: float, v: int):
+        """Feed one 1-minute candle; the newest minute may be fed again as it changes."""
+        if self.last_ts is not None and ts < self.last_ts:
+            return  # Older than what is already aggregated
+        anchor = _session_anchor(ts)
+        if anchor != self.anchor:
+            self.reset()
+            self.anchor = anchor
+        revised = ts == self.last_ts
+        self.last_ts = ts
+        minute = (o, h, l, c, v)
+        for m in TIMEFRAMES:
+            bars, forming = self.bars[m], self._forming[m]
+            start = anchor + (ts - anchor) // (m * 60) * m * 60
+            if revised:
+                forming[-1] = minute
+                bar = bars[-1]
+                bar[2] = max(row[1] for row in forming)
+                bar[3] = min(row[2] for row in forming)
+                bar[4] = c
+                bar[5] = sum(row[4] for row in forming)
+                if len(forming) == 1:
+                    bar[1] = o
+            elif bars and bars[-1][0] == start:
+                forming.append(minute)
+                bar = bars[-1]
+                bar[2] = max(bar[2], h)
+                bar[3] = min(bar[3], l)
+                bar[4] = c
+                bar[5] += v
+            else:
+                self._forming[m] = [minute]
+                bars.append([start, o, h, l, c, v])
+
+    def candles(self, minutes: int) -> list[dict]:
+        """Bars of one of TIMEFRAMES in the API shape, newest first."""
+        return [_candle(*bar) for bar in reversed(self.bars[minutes])]
@@ -0,0 +1,286 @@
+"""
+Screening Rules - declarative trend rules compiled to vectorized predicates.
+
+A rule is a boolean expression over indicator fields, for example
+
+    price > senkou_span_b AND macd_hist rising AND chikou_span > close[26]
+
+Grammar:
+    expr     := and_expr ("OR" and_expr)*
+    and_expr := not_expr ("AND" not_expr)*
+    not_expr := "NOT" not_expr | "(" expr ")" | operand ("rising" | "falling")
+              | operand CMP operand
+    operand  := FIELD ["[" INT "]"] | NUMBER
+    CMP      := > | < | >= | <= | == | !=
+
+``field[k]`` is the value k bars before the latest one; ``x rising`` means
+``x > x[1]``. Missing values (warm-up periods, short history) are NaN, so any
+comparison involving them is False.
+
+Rules compile once into closures over NumPy arrays and are evaluated for every
+symbol of a batch in one pass. Evaluation goes through a context object whose
+``get(field, offset)`` returns one array per field/offset, so the same compiled
+rule serves a single-day snapshot (SnapshotContext) or a full history panel.
+"""
+import operator
+import re
+
+import numpy as np
+
+FIELDS = (
+    "price",  # current/live price (equals close without a live overlay)
+    "open",
+    "high",
+    "low",
+    "close",
+    "macd",
+    "macd_signal",
+    "macd_hist",
+    "tenkan_sen",
+    "kijun_sen",
+    "senkou_span_a",
+    "senkou_span_b",
+    "chikou_span",
+)
+
+NEUTRAL = ("Neutral/Mixed", "gray")
+
+# Ordered rule sets: the first matching rule decides the trend, otherwise NEUTRAL.
+# "default" is the ScreenerV13 Ichimoku + MACD logic.
+RULE_SETS = {
+    "default": [
+        {
+            "trend": "Bullish",
+            "color": "green",
+            "when": (
+                "price > senkou_span_b"
+                " AND macd_hist > 0 AND macd_signal > 0 AND macd_hist rising"
+                " AND price > senkou_span_a[26] AND price > senkou_span_b[26]"
+                " AND senkou_span_a[26] > senkou_span_b[26]"
+                " AND chikou_span > close[26]"
+                " AND close > open"
+            ),
+        },
+        {
+            "trend": "Bearish",
+            "color": "red",
+            "when": (
+                "price < senkou_span_b"
+                " AND macd_hist < 0 AND macd_signal < 0 AND macd_hist falling"
+                " AND price < senkou_span_a[26] AND price < senkou_span_b[26]"
+                " AND senkou_span_b[26] > senkou_span_a[26]"
+                " AND chikou_span < close[26]"
+                " AND close < open"
+            ),
+        },
+    ],
+}
+
+_COMPARATORS = {
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z0-9_]*)|(>=|<=|==|!=|[><()\[\]]))")
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+def tokenize(text: str) -> list[tuple[str, str]]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise RuleSyntaxError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("number", number))
+        elif name is not None:
+            upper = name.upper()
+            if upper in ("AND", "OR", "NOT"):
+                tokens.append(("keyword", upper))
+            elif name in ("rising", "falling"):
+                tokens.append(("keyword", name))
+            else:
+                tokens.append(("name", name))
+        else:
+            tokens.append(("symbol", symbol))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a tuple AST."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self, kind=None, value=None):
+        token = self._peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "token"
+            raise RuleSyntaxError(f"Expected {expected} at token {self.pos} in {self.text!r}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self._expr()
+        if self.pos != len(self.tokens):
+            raise RuleSyntaxError(f"Unexpected {self._peek()[1]!r} in {self.text!r}")
+        return node
+
+    def _expr(self):
+        node = self._and()
+        while self._peek() == ("keyword", "OR"):
+            self._take()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._peek() == ("keyword", "AND"):
+            self._take()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self):
+        if self._peek() == ("keyword", "NOT"):
+            self._take()
+            return ("not", self._not())
+        if self._peek() == ("symbol", "("):
+            self._take()
+            node = self._expr()
+            self._take("symbol", ")")
+            return node
+        left = self._operand()
+        kind, value = self._peek()
+        if kind == "keyword" and value in ("rising", "falling"):
+            self._take()
+            if left[0] != "field":
+                raise RuleSyntaxError(f"'{value}' needs a field in {self.text!r}")
+            return (value, left)
+        if kind == "symbol" and value in _COMPARATORS:
+            self._take()
+            return ("cmp", value, left, self._operand())
+        raise RuleSyntaxError(f"Expected comparison after operand in {self.text!r}")
+
+    def _operand(self):
+        kind, value = self._take()
+        if kind == "number":
+            return ("const", float(value))
+        if kind != "name":
+            raise RuleSyntaxError(f"Expected field or number, got {value!r} in {self.text!r}")
+        if value not in FIELDS:
+            raise RuleSyntaxError(f"Unknown field {value!r} in {self.text!r}")
+        offset = 0
+        if self._peek() == ("symbol", "["):
+            self._take()
+            offset = int(self._take("number")[1])
+            self._take("symbol", "]")
+        return ("field", value, offset)
+
+
+def _compile(node, refs: set):
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return lambda ctx: value
+    if kind == "field":
+        _, name, offset = node
+        refs.add((name, offset))
+        return lambda ctx: ctx.get(name, offset)
+    if kind in ("rising", "falling"):
+        _, name, offset = node[1]
+        refs.update({(name, offset), (name, offset + 1)})
+        compare = operator.gt if kind == "rising" else operator.lt
+        return lambda ctx: compare(ctx.get(name, offset), ctx.get(name, offset + 1))
+    if kind == "cmp":
+        compare = _COMPARATORS[node[1]]
+        left, right = _compile(node[2], refs), _compile(node[3], refs)
+        return lambda ctx: compare(left(ctx), right(ctx))
+    if kind == "not":
+        inner = _compile(node[1], refs)
+        return lambda ctx: np.logical_not(inner(ctx))
+    left, right = _compile(node[1], refs), _compile(node[2], refs)
+    combine = np.logical_and if kind == "and" else np.logical_or
+    return lambda ctx: combine(left(ctx), right(ctx))
+
+
+class CompiledRule:
+    def __init__(self, text: str):
+        self.text = text
+        self.refs: set[tuple[str, int]] = set()
+        self._evaluate = _compile(_Parser(text).parse(), self.refs)
+
+    def evaluate(self, ctx) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return np.asarray(self._evaluate(ctx), dtype=bool)
+
+
+class RuleSet:
+    """Ordered (trend, color, rule) list; the first matching rule wins."""
+
+    def __init__(self, rules: list[dict]):
+        self.rules = [(r["trend"], r["color"], CompiledRule(r["when"])) for r in rules]
+        self.refs = set().union(*(rule.refs for _, _, rule in self.rules)) if self.rules else set()
+        self.fields = sorted({name for name, _ in self.refs})
+        # Number of bars (latest first) a snapshot context must hold
+        self.depth = max((offset for _, offset in self.refs), default=0) + 1
+
+    def classify(self, ctx) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized trend/color arrays, shaped like the context's field arrays."""
+        conditions = [rule.evaluate(ctx) for _, _, rule in self.rules]
+        trends = np.select(conditions, [t for t, _, _ in self.rules], default=NEUTRAL[0])
+        colors = np.select(conditions, [c for _, c, _ in self.rules], default=NEUTRAL[1])
+        return trends, colors
+
+
+class SnapshotContext:
+    """Latest-bars context: one (symbols, depth) matrix per field, column k = k bars ago."""
+
+    def __init__(self, matrices: dict[str, np.ndarray]):
+        self.matrices = matrices
+        self.size = len(next(iter(matrices.values()))) if matrices else 0
+
+    @classmethod
+    def from_series(cls, series: list[dict], fields, depth: int) -> "SnapshotContext":
+        """Build from per-symbol dicts of field -> values (latest first; None for missing)."""
+        matrices = {}
+        for name in fields:
+            matrix = np.full((len(series), depth), np.nan)
+            for i, values in enumerate(series):
+                row = values[name][:depth]
+                if row:
+                    matrix[i, : len(row)] = np.array(row, dtype=float)
+            matrices[name] = matrix
+        return cls(matrices)
+
+    def get(self, name: str, offset: int) -> np.ndarray:
+        matrix = self.matrices[name]
+        if offset >= matrix.shape[1]:
+            return np.full(matrix.shape[0], np.nan)
+        return matrix[:, offset]
+
+
+_compiled: dict[str, RuleSet] = {}
+
+
+def get_rule_set(name: str = "default") -> RuleSet:
+    """Compiled rule set by name (compiled once per process)."""
+    rule_set = _compiled.get(name)
+    if rule_set is None:
+        if name not in RULE_SETS:
+            raise KeyError(f"Unknown rule set {name!r}")
+        rule_set = _compiled[name] = RuleSet(RULE_SETS[name])
+    return rule_set
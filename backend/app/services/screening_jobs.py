@@ -0,0 +1,196 @@
+"""
+Screening Jobs - fire-and-poll wrapper around screening_runner.
+
+POST /api/screening/jobs returns a job id at once; the run continues in the
+background and its progress (symbols done, share of the per-symbol stage work
+done, current stage, ETA) is read from the run's ScreeningRunStats.
+
+The worker running a job copies its status to screening_jobs every
+SYNC_SECONDS, and its encoded result once it finishes, so a poll that lands
+on any worker can answer. A job whose row stops updating while unfinished
+(its worker exited) is reported as failed after LOST_AFTER_SECONDS. Finished
+jobs are kept for settings.SCREENING_JOB_TTL seconds so the result can be
+fetched by id. Without a database, jobs are only visible to their own worker.
+"""
+import asyncio
+import time
+import uuid
+
+from app.config import settings
+from app.core.constants import STOCK_LIST
+from app.core.timezone import now_ist
+from app.database import get_pool
+from app.repositories import job_repository
+from app.services import screening_runner
+from app.services.snapshot_store import ENCODING, decode_snapshot, encode_snapshot
+from app.services.upstox_api import UpstoxAPI
+
+MAX_JOBS = 100
+SYNC_SECONDS = 1.0
+LOST_AFTER_SECONDS = 30.0
+
+# Jobs run by this worker
+_jobs: dict[str, dict] = {}
+
+
+def _prune():
+    now = time.monotonic()
+    expired = [
+        job_id
+        for job_id, job in _jobs.items()
+        if job["finished"] is not None and now - job["finished"] > settings.SCREENING_JOB_TTL
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+    # Oldest finished jobs go first if the registry is still over capacity
+    finished = sorted(
+        (job for job in _jobs.values() if job["finished"] is not None), key=lambda j: j["finished"]
+    )
+    for job in finished[: max(0, len(_jobs) - MAX_JOBS)]:
+        del _jobs[job["id"]]
+
+
+async def _get_pool():
+    try:
+        return await get_pool()
+    except Exception:
+        return None  # No database (e.g. mock-only setups)
+
+
+async def _store(job: dict):
+    """Write the job's status (and result, once there is one) for the other workers."""
+    pool = await _get_pool()
+    if pool is None:
+        return
+    payload = None
+    if job["result"] is not None:
+        payload = await asyncio.to_thread(encode_snapshot, job["result"])
+    await job_repository.save_job(
+        pool, job["id"], _status(job), ENCODING if payload is not None else None, payload
+    )
+
+
+async def _sync_progress(job: dict):
+    while True:
+        await asyncio.sleep(SYNC_SECONDS)
+        await _store(job)
+
+
+async def _run_job(job: dict, api: UpstoxAPI):
+    job["status"] = "running"
+    sync = asyncio.create_task(_sync_progress(job))
+    try:
+        job["result"] = await screening_runner.run_screening(api, **job["params"], fresh=job["fresh"])
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = f"{type(e).__name__}: {str(e)[:100]}"
+    finally:
+        job["finished"] = time.monotonic()
+        sync.cancel()
+        await _store(job)
+
+
+async def submit_job(
+    api: UpstoxAPI,
+    use_mock=True,
+    use_live_data=False,
+    intraday_interval=1,
+    deadline: float | None = None,
+    fresh: bool = False,
+) -> dict:
+    """Start a screening run in the background and return its status."""
+    _prune()
+    pool = await _get_pool()
+    if pool is not None:
+        await job_repository.delete_finished_jobs(pool, settings.SCREENING_JOB_TTL)
+    params = {
+        "use_mock": use_mock,
+        "use_live_data": use_live_data,
+        "intraday_interval": intraday_interval,
+        "deadline": deadline,
+    }
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "params": params,
+        "key": screening_runner.run_key(use_mock, use_live_data, intraday_interval),
+        "fresh": fresh,
+        "submitted_at": now_ist().strftime("%Y-%m-%d %H:%M:%S"),
+        "finished": None,
+        "result": None,
+        "error": None,
+    }
+    _jobs[job["id"]] = job
+    await _store(job)
+    job["task"] = asyncio.create_task(_run_job(job, api))
+    return _status(job)
+
+
+def _stored_status(stored: dict) -> dict:
+    status = stored["state"]
+    if status["status"] in ("queued", "running") and stored["age"] > LOST_AFTER_SECONDS:
+        status.update(status="failed", error="The worker running this job stopped")
+    return status
+
+
+async def get_job(job_id: str) -> dict | None:
+    """Status, result and error of a job run by any worker."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job
+    pool = await _get_pool()
+    stored = await job_repository.get_job(pool, job_id, with_result=True) if pool else None
+    if stored is None:
+        return None
+    status = _stored_status(stored)
+    result = None
+    if status["status"] == "completed" and stored["encoding"] == ENCODING:
+        result = await asyncio.to_thread(decode_snapshot, stored["result"])
+    return {"status": status["status"], "result": result, "error": status["error"]}
+
+
+async def get_job_status(job_id: str) -> dict | None:
+    """Progress view of a job run by any worker: symbols done of total, current stage and ETA."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        return _status(job)
+    pool = await _get_pool()
+    stored = await job_repository.get_job(pool, job_id) if pool else None
+    return _stored_status(stored) if stored is not None else None
+
+
+def _status(job: dict) -> dict:
+    total = len(STOCK_LIST)
+    status = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "params": job["params"],
+        "submitted_at": job["submitted_at"],
+        "total": total,
+        "done": 0,
+        "progress": 0.0,
+        "stage": None,
+        "elapsed": None,
+        "eta_seconds": None,
+        "error": job["error"],
+    }
+    if job["status"] == "completed":
+        status.update(done=total, progress=1.0, stage="done", eta_seconds=0.0)
+        return status
+
+    # Kept on the job so that progress does not drop back between the run ending and the job
+    stats = job["stats"] = screening_runner.active_run(job["key"]) or job.get("stats")
+    if stats is not None and stats.planned_stages:
+        # History and live work counts too; final outcomes only arrive in compute
+        progress = min(1.0, stats.stage_work / (total * len(stats.planned_stages)))
+        elapsed = stats.elapsed
+        status.update(
+            done=stats.completed,
+            progress=round(progress, 4),
+            stage=stats.current_stage,
+            elapsed=round(elapsed, 2),
+        )
+        if progress:
+            status["eta_seconds"] = round(elapsed / progress * (1 - progress), 2)
+    return status
@@ -0,0 +1,266 @@
+"""
+Screening Runner - executes full screening runs and holds the latest results.
+
+Concurrent runs with identical parameters share one execution (single-flight):
+a Refresh click or auto-refresh that arrives while the same scan is in flight
+attaches to it instead of starting a second 211-stock scan. The deadline and
+``fresh`` flag are not part of the key: a scan in flight is as fresh as it
+gets, and a caller joining it waits at most its own deadline.
+
+Across uvicorn workers the results live in snapshot_store. One worker computes
+a run while holding its advisory lock and publishes a new snapshot version;
+every worker adopts that version when notified. A request whose parameters
+match a snapshot published less than SCREENING_SHARED_MAX_AGE seconds ago is
+served that snapshot without scanning, unless stored daily history changed
+after it was taken (daily_prices events on the invalidation bus) or the caller
+asked for a fresh run. Responses taken from another run's snapshot are
+flagged ``shared``.
+
+A run's deadline covers the whole request: time spent waiting for another
+worker's snapshot is taken from the budget of a local scan that follows.
+"""
+import asyncio
+import time
+
+from app.config import settings
+from app.core.constants import STOCK_LIST
+from app.core.invalidation import bus
+from app.core.metrics import registry
+from app.core.singleflight import SingleFlight
+from app.services import screening_service, signal_events, snapshot_store
+from app.services.screening_stats import ScreeningRunStats
+from app.services.upstox_api import UpstoxAPI
+
+shared_runs_total = registry.counter(
+    "screening_singleflight_shared_total",
+    "Screening requests served by attaching to an identical run already in flight",
+)
+
+shared_snapshots_total = registry.counter(
+    "screening_shared_snapshot_total",
+    "Screening requests served from a snapshot published by another run or worker",
+    ("reason",),
+)
+
+_flight = SingleFlight()
+# Serializes publishing a run and adopting versions announced by other workers
+_publish_lock = asyncio.Lock()
+_adopt_tasks: set[asyncio.Task] = set()
+# Stats of runs currently in flight, by run_key (for progress reporting)
+_active_runs: dict[tuple, ScreeningRunStats] = {}
+
+# Cache for last screening results
+_last_results: dict | None = None
+# time.time() of the last daily_prices change seen by this worker
+_history_changed_at = 0.0
+
+
+def get_last_results() -> dict | None:
+    return _last_results
+
+
+def _local_version() -> int:
+    return (_last_results or {}).get("version") or 0
+
+
+async def restore_last_results() -> bool:
+    """Load the persisted snapshot into the cache (app startup); True if one was found."""
+    global _last_results
+    snapshot = await snapshot_store.load()
+    if snapshot is None:
+        return False
+    _last_results = snapshot
+    return True
+
+
+async def _adopt(version: int):
+    """Replace the cached results with a newer published snapshot version."""
+    global _last_results
+    async with _publish_lock:
+        if version <= _local_version():
+            return
+        snapshot = await snapshot_store.load()
+        if snapshot is not None and snapshot["version"] > _local_version():
+            _last_results = snapshot
+
+
+def _on_history_changed(key, data):
+    global _history_changed_at
+    _history_changed_at = time.time()
+
+
+def _on_snapshot(version: int):
+    task = asyncio.create_task(_adopt(version))
+    _adopt_tasks.add(task)
+    task.add_done_callback(_adopt_tasks.discard)
+
+
+def start_sync():
+    """Follow snapshots published by any worker (app startup)."""
+    snapshot_store.follow(_on_snapshot)
+    bus.subscribe("daily_prices", _on_history_changed)
+
+
+def run_key(use_mock, use_live_data, intraday_interval, as_of=None) -> tuple:
+    """Parameters that make two runs interchangeable."""
+    if as_of:
+        return ("as_of", as_of)
+    return (bool(use_mock), bool(use_live_data), int(intraday_interval))
+
+
+def active_run(key: tuple) -> ScreeningRunStats | None:
+    """Stats of the in-flight run for ``key``, if any."""
+    return _active_runs.get(key)
+
+
+def _shared(response: dict | None) -> dict | None:
+    """``response`` flagged as taken from an earlier or another worker's run."""
+    return None if response is None else {**response, "shared": True}
+
+
+async def _recent_snapshot(key_text: str) -> dict | None:
+    """The published snapshot for ``key_text`` if younger than SCREENING_SHARED_MAX_AGE."""
+    if settings.SCREENING_SHARED_MAX_AGE <= 0:
+        return None
+    info = await snapshot_store.info()
+    if info is None or info["run_key"] != key_text or info["age"] > settings.SCREENING_SHARED_MAX_AGE:
+        return None
+    if time.time() - info["age"] < _history_changed_at:
+        return None  # Taken before the stored history changed
+    await _adopt(info["version"])
+    return _shared(_last_results) if _local_version() == info["version"] else None
+
+
+async def _wait_for_shared(key_text: str, announced: int, timeout: float) -> dict | None:
+    """Wait for the worker holding the lock on ``key_text`` to publish its snapshot."""
+    version = await snapshot_store.wait_for_version(key_text, announced, timeout)
+    if version is None:
+        return None
+    await _adopt(version)
+    return _shared(_last_results) if _local_version() >= version else None
+
+
+def _deadline_exceeded(use_mock, use_live_data, intraday_interval, deadline, as_of=None) -> dict:
+    """Response of a run whose budget was spent waiting: every symbol timed out."""
+    params = {
+        "use_mock": use_mock,
+        "use_live_data": use_live_data,
+        "intraday_interval": intraday_interval,
+        "deadline": deadline,
+    }
+    if as_of:
+        params = {"as_of": as_of, "deadline": deadline}
+    stats = ScreeningRunStats(
+        "as_of" if as_of else "mock" if use_mock else "live" if use_live_data else "db", params
+    )
+    for stock in STOCK_LIST:
+        stats.record_timeout(stock["symbol"], "shared_wait")
+    return screening_service.build_screening_response([], stats, None if as_of else _last_results)
+
+
+async def _compute(
+    api: UpstoxAPI, use_mock, use_live_data, intraday_interval, deadline, as_of=None, budget=None
+) -> dict:
+    """Scan and publish; ``budget`` (seconds left of ``deadline``) bounds the scan if given."""
+    global _last_results
+
+    params = {
+        "use_mock": use_mock,
+        "use_live_data": use_live_data,
+        "intraday_interval": intraday_interval,
+        "deadline": deadline,
+    }
+    if as_of:
+        params = {"as_of": as_of, "deadline": deadline}
+    stats = ScreeningRunStats(
+        "as_of" if as_of else "mock" if use_mock else "live" if use_live_data else "db", params
+    )
+    key = run_key(use_mock, use_live_data, intraday_interval, as_of)
+    _active_runs[key] = stats
+    try:
+        results = await screening_service.screen_stocks(
+            STOCK_LIST,
+            api,
+            use_live_data,
+            intraday_interval,
+            use_mock,
+            stats=stats,
+            deadline_seconds=deadline if budget is None else budget,
+            as_of=as_of,
+        )
+        if as_of:
+            # Point-in-time runs are audits; they never replace the live results
+            return screening_service.build_screening_response(results, stats)
+        async with _publish_lock:
+            previous = _last_results
+            _last_results = screening_service.build_screening_response(results, stats, previous)
+            await signal_events.record_transitions(previous, _last_results, stats.run_id)
+            version = await snapshot_store.publish(_last_results, _key_text(key))
+            if version is not None:
+                _last_results["version"] = version
+        return _last_results
+    finally:
+        _active_runs.pop(key, None)
+
+
+def _key_text(key: tuple) -> str:
+    return "|".join(str(part) for part in key)
+
+
+async def _execute(api: UpstoxAPI, use_mock, use_live_data, intraday_interval, deadline, as_of=None) -> dict:
+    if as_of:
+        return await _compute(api, use_mock, use_live_data, intraday_interval, deadline, as_of)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    key_text = _key_text(run_key(use_mock, use_live_data, intraday_interval))
+    announced = snapshot_store.announced_version()
+    async with snapshot_store.compute_lock(key_text) as owner:
+        if owner:
+            return await _compute(api, use_mock, use_live_data, intraday_interval, deadline)
+    # Another worker is running the same scan: serve its snapshot once published
+    timeout = settings.SCREENING_SHARED_WAIT if deadline is None else deadline - (loop.time() - started)
+    shared = await _wait_for_shared(key_text, announced, timeout) if timeout > 0 else None
+    if shared is not None:
+        shared_snapshots_total.inc(reason="waited")
+        return shared
+    # It failed or took too long; scan here with whatever is left of the deadline
+    budget = None if deadline is None else deadline - (loop.time() - started)
+    if budget is not None and budget <= 0:
+        return _deadline_exceeded(use_mock, use_live_data, intraday_interval, deadline)
+    return await _compute(api, use_mock, use_live_data, intraday_interval, deadline, budget=budget)
+
+
+async def run_screening(
+    api: UpstoxAPI,
+    use_mock=True,
+    use_live_data=False,
+    intraday_interval=1,
+    deadline: float | None = None,
+    as_of: str | None = None,
+    fresh: bool = False,
+) -> dict:
+    """Run (or join an identical in-flight) screening of STOCK_LIST.
+
+    With ``as_of`` the run screens stored history up to that date (see screen_stocks).
+    With ``fresh`` a recently published snapshot is not reused (explicit refresh).
+    """
+    key = run_key(use_mock, use_live_data, intraday_interval, as_of)
+    joining = _flight.in_flight(key)
+    if not (as_of or fresh or joining):
+        recent = await _recent_snapshot(_key_text(key))
+        if recent is not None:
+            shared_snapshots_total.inc(reason="recent")
+            return recent
+    flight = _flight.do(key, lambda: _execute(api, use_mock, use_live_data, intraday_interval, deadline, as_of))
+    if not joining or deadline is None:
+        # A run started here applies the deadline itself and returns what it has
+        response, shared = await flight
+    else:
+        try:
+            response, shared = await asyncio.wait_for(flight, deadline)
+        except asyncio.TimeoutError:
+            return _deadline_exceeded(use_mock, use_live_data, intraday_interval, deadline, as_of)
+    if shared:
+        shared_runs_total.inc()
+    return response
@@ -1,218 +1,519 @@
 """
 Screening Service - Async port of ScreenerV13.py fetch_single_stock_data (lines 2623-2857).
-ALL screening conditions preserved EXACTLY. No logic changes.
+ALL screening conditions preserved EXACTLY. No logic changes. The Bullish/Bearish
+conditions live in rules.RULE_SETS["default"] and are evaluated per batch.
+
+A screening run is a pipeline of batched stages, each with its own concurrency
+limit and timing:
+  1. history  - bulk load of daily candles (DB, API fallback, or mock)
+  2. live     - intraday overlay of today's candle (only with use_live_data)
+  3. compute  - indicators + rule evaluation, batched onto the compute pool
+  4. publish  - grouping into bullish/bearish/neutral (build_screening_response)
 """
 import asyncio
-from datetime import datetime, date
+import time
+from datetime import date
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.config import settings
+from app.services.backtest import classify_panel
+from app.services.compute_pool import run_compute
+from app.services.indicator_panel import indicator_panel
 from app.services.indicators import calculate_indicators
 from app.services.mock_data import generate_mock_historical_data
+from app.services.rules import RuleSet, SnapshotContext, get_rule_set
+from app.services.screening_stats import ScreeningRunStats
 from app.services.upstox_api import UpstoxAPI
 from app.database import get_pool
-from app.repositories import price_repository
+from app.services import candle_cache, intraday_store, price_store
+from app.services.history_writer import history_writer
 from app.core.timezone import now_ist
+from app.models.schemas import ScreeningResponse
 
+HISTORY_DAYS = 200
+MIN_HISTORY_DAYS = 60
 
-async def fetch_single_stock_data(
-    stock, api: UpstoxAPI, use_live_data, intraday_interval, use_mock=False
+
+class DeadlineExceeded(Exception):
+    """Placeholder result for work still pending when the run deadline expired."""
+
+
+async def _gather_limited(limit, coros, deadline: float | None = None):
+    """Await coroutines with at most ``limit`` in flight.
+
+    Results come back in order, exceptions as values. If ``deadline`` (event loop
+    time) passes first, unfinished coroutines are cancelled and reported as
+    DeadlineExceeded instances.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(coro):
+        try:
+            async with semaphore:
+                return await coro
+        finally:
+            coro.close()  # no-op once awaited; avoids "never awaited" when cancelled early
+
+    tasks = [asyncio.ensure_future(_run(c)) for c in coros]
+    if not tasks:
+        return []
+    timeout = None if deadline is None else max(0.0, deadline - asyncio.get_running_loop().time())
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return [
+        (task.exception() or task.result()) if task in done else DeadlineExceeded()
+        for task in tasks
+    ]
+
+
+def _chunks(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _describe(error: BaseException) -> str:
+    return f"{type(error).__name__}: {str(error)[:100]}"
+
+
+# --- Stage 1: history ---
+def _parse_dates(data_desc):
+    """Convert 'YYYY-MM-DD' dates of API / mock candles in place, to match rows read from the DB."""
+    for row in data_desc:
+        if isinstance(row["date"], str):
+            row["date"] = date.fromisoformat(row["date"])
+    return data_desc
+
+
+async def load_history_stage(
+    stock_list, api: UpstoxAPI, use_mock=False, stats=None, deadline=None, as_of=None
 ):
-    try:
-        symbol = stock["symbol"]
-        if use_mock:
-            data_desc = generate_mock_historical_data(symbol, days=200)
+    """Load daily candles for every stock: {symbol: history}.
+
+    Stored candles come from the memory-mapped candle_cache where it has them,
+    else from Postgres; symbols without stored history are fetched from the API.
+    Cached symbols keep the cache's ascending column views ({key: array}, no
+    copies); the others are descending candle rows.
+    With ``as_of`` only stored rows up to that date are used; symbols without
+    any are dropped rather than fetched, since the API only serves current data.
+    """
+    stats = stats or ScreeningRunStats()
+    symbols = [stock["symbol"] for stock in stock_list]
+    if use_mock:
+        histories = {}
+        for symbol in symbols:
+            started = time.perf_counter()
+            histories[symbol] = generate_mock_historical_data(symbol, days=HISTORY_DAYS)
+            stats.record_source(symbol, "mock")
+            stats.record_symbol_stage(symbol, "history", time.perf_counter() - started)
+        return histories
+
+    pool = await get_pool()
+    histories = {}
+    if not as_of:
+        started = time.perf_counter()
+        cached = await candle_cache.get_columns(symbols, HISTORY_DAYS)
+        histories.update(cached)
+        for symbol in cached:
+            stats.record_source(symbol, "cache")
+        elapsed = time.perf_counter() - started
+        for symbol in cached:
+            stats.record_symbol_stage(symbol, "history", elapsed)
+
+    async def _load_batch(batch):
+        started = time.perf_counter()
+        rows = await price_store.load_latest(pool, batch, HISTORY_DAYS, as_of)
+        # One query serves the whole batch, so each symbol is charged the batch time
+        elapsed = time.perf_counter() - started
+        for symbol in batch:
+            stats.record_symbol_stage(symbol, "history", elapsed)
+        return rows
+
+    pending = [symbol for symbol in symbols if symbol not in histories]
+    chunks = _chunks(pending, settings.SCREENING_LOAD_BATCH_SIZE)
+    batches = await _gather_limited(
+        settings.SCREENING_LOAD_CONCURRENCY, [_load_batch(batch) for batch in chunks], deadline
+    )
+    timed_out = set()
+    for chunk, batch in zip(chunks, batches):
+        if isinstance(batch, DeadlineExceeded):
+            timed_out.update(chunk)
+            for symbol in chunk:
+                stats.record_timeout(symbol, "history")
+        elif isinstance(batch, dict):
+            histories.update(batch)
+            for symbol in batch:
+                stats.record_source(symbol, "db")
+    if as_of:
+        for symbol in symbols:
+            if not histories.get(symbol) and symbol not in timed_out:
+                stats.record_failure(symbol, "history", "no_history", f"no rows on or before {as_of}")
+        return histories
+
+    async def _fetch_missing(symbol):
+        started = time.perf_counter()
+        data_desc = await api.get_historical_data(symbol, days=HISTORY_DAYS)
+        if data_desc:
+            _parse_dates(data_desc)
+            if not history_writer.submit(symbol, data_desc):
+                await price_store.save_history(pool, symbol, data_desc)
+            stats.record_source(symbol, "api")
+        else:
+            data_desc = _parse_dates(generate_mock_historical_data(symbol, days=HISTORY_DAYS))
+            stats.record_source(symbol, "mock_fallback")
+        stats.record_symbol_stage(symbol, "history_api", time.perf_counter() - started)
+        return symbol, data_desc
+
+    missing = [symbol for symbol in symbols if not histories.get(symbol) and symbol not in timed_out]
+    fetched = await _gather_limited(
+        settings.SCREENING_API_CONCURRENCY, [_fetch_missing(symbol) for symbol in missing], deadline
+    )
+    for symbol, item in zip(missing, fetched):
+        if isinstance(item, DeadlineExceeded):
+            stats.record_timeout(symbol, "history")
+        elif isinstance(item, BaseException):
+            stats.record_failure(symbol, "history", "error", _describe(item))
         else:
-            pool = await get_pool()
-            data_desc = await price_repository.get_historical_data(pool, symbol, days=200)
-            if not data_desc:
-                data_desc = await api.get_historical_data(symbol, days=200)
-                if data_desc:
-                    await price_repository.save_historical_data(pool, symbol, data_desc)
-                else:
-                    data_desc = generate_mock_historical_data(symbol, days=200)
-
-        if not data_desc or len(data_desc) < 60:
-            return None
-
-        current_price = data_desc[0]["close"]
-        high_price = data_desc[0]["high"]
-        low_price = data_desc[0]["low"]
-        open_price = data_desc[0]["open"]
-
-        # Fetch current/live price if enabled
-        if use_live_data and not use_mock:
+            histories[symbol] = item[1]
+    return histories
+
+
+def _bars(history) -> int:
+    """Number of candles in a history, either column views or candle rows."""
+    return len(history["date"]) if isinstance(history, dict) else len(history)
+
+
+def _latest_prices(history):
+    """(close, high, low, open) of the newest candle of a history."""
+    if isinstance(history, dict):
+        return tuple(history[key][-1].item() for key in ("close", "high", "low", "open"))
+    latest = history[0]
+    return latest["close"], latest["high"], latest["low"], latest["open"]
+
+
+# --- Stage 2: live overlay ---
+def apply_live_overlay(data_desc, session):
+    """Merge today's session (current, high, low, open) into a history and return it."""
+    current_price, high_price, low_price, open_price = session
+    if isinstance(data_desc, dict):
+        # Column views: new arrays with today's bar inserted, ahead of any bar of the same day
+        today = np.datetime64(date.today(), "D")
+        at = int(np.searchsorted(data_desc["date"], today, side="left"))
+        bar = {
+            "date": today,
+            "open": open_price,
+            "high": high_price,
+            "low": low_price,
+            "close": current_price,
+            "volume": 22,
+        }
+        for key, value in bar.items():
+            data_desc[key] = np.insert(data_desc[key], at, value)
+        return current_price, high_price, low_price, open_price
+    new_row_dict = {
+        "date": date.today(),
+        "open": open_price,
+        "high": high_price,
+        "low": low_price,
+        "close": current_price,
+        "volume": 22,
+    }
+    data_desc.append(new_row_dict)
+    # Stored rows come back from the DATE column as date objects (API rows are parsed on fetch)
+    data_desc.sort(key=lambda x: x["date"], reverse=True)
+    return current_price, high_price, low_price, open_price
+
+
+async def live_overlay_stage(
+    stock_list, api: UpstoxAPI, histories, intraday_interval, stats=None, deadline=None
+):
+    """Overlay live intraday candles; returns {symbol: (current, high, low, open)}.
+
+    Symbols whose overlay is still pending at ``deadline`` are removed from
+    ``histories`` so that they are not published with stale daily prices.
+    """
+    stats = stats or ScreeningRunStats()
+
+    async def _overlay(symbol):
+        data_desc = histories[symbol]
+        started = time.perf_counter()
+        try:
+            intraday_data, error = await intraday_store.get_current_data(
+                api, symbol, interval_minutes=intraday_interval
+            )
+            if intraday_data and len(intraday_data) > 0:
+                # Session OHLC is kept incrementally from the minute bars just served
+                return symbol, apply_live_overlay(data_desc, intraday_store.session_ohlc(symbol))
+            stats.record_live_miss(symbol, error)
+        except Exception as e:
+            stats.record_live_miss(symbol, _describe(e))  # Fall back to historical data
+        finally:
+            stats.record_symbol_stage(symbol, "live", time.perf_counter() - started)
+        return symbol, None
+
+    symbols = [stock["symbol"] for stock in stock_list if stock["symbol"] in histories]
+    overlays = await _gather_limited(
+        settings.MAX_PARALLEL_WORKERS, [_overlay(symbol) for symbol in symbols], deadline
+    )
+    for symbol, item in zip(symbols, overlays):
+        if isinstance(item, DeadlineExceeded):
+            stats.record_timeout(symbol, "live")
+            del histories[symbol]
+    return {item[0]: item[1] for item in overlays if isinstance(item, tuple) and item[1]}
+
+
+# --- Stage 3: compute ---
+def compute_batch(items, rule_set_name=None):
+    """Compute a batch of (stock, columns, current, high, low, open) items in one worker call.
+
+    Indicators are computed per stock, then the rule set classifies the whole
+    batch in one vectorized pass. Returns (symbol, result, failure_reason,
+    failure_detail, seconds) per item so that outcomes survive the trip back
+    from a worker process.
+    """
+    rule_set = get_rule_set(rule_set_name or settings.SCREENING_RULE_SET)
+    outcomes = {}
+    prepared_list = []
+    for item in items:
+        symbol = item[0]["symbol"]
+        started = time.perf_counter()
+        try:
+            prepared_list.append(prepare_stock(*item))
+            outcomes[symbol] = [None, None, None, time.perf_counter() - started]
+        except ScreeningSkip as e:
+            outcomes[symbol] = [None, e.args[0], None, time.perf_counter() - started]
+        except Exception as e:
+            outcomes[symbol] = [None, "error", _describe(e), time.perf_counter() - started]
+
+    if prepared_list:
+        started = time.perf_counter()
+        classified = classify_prepared(prepared_list, rule_set)
+        # The rules pass is shared; charge each stock an equal slice of it
+        rules_share = (time.perf_counter() - started) / len(prepared_list)
+        for prepared, (trend, color) in zip(prepared_list, classified):
+            outcome = outcomes[prepared["stock"]["symbol"]]
+            started = time.perf_counter()
             try:
-                intraday_data, error = await api.get_current_data(
-                    symbol, interval_minutes=intraday_interval
-                )
-                if intraday_data and len(intraday_data) > 0:
-                    # Get the most recent candle for current price
-                    current_price = intraday_data[0]["close"]
-                    # Get the high and low from today's intraday data
-                    high_price = max([c["high"] for c in intraday_data])
-                    low_price = min([c["low"] for c in intraday_data])
-                    # Sort intraday data by datetime ascending to get open price
-                    sorted_intraday = sorted(intraday_data, key=lambda x: x["datetime"])
-                    open_price = sorted_intraday[0]["open"]
-                    new_row_dict = {
-                        "date": date.today(),
-                        "open": open_price,
-                        "high": high_price,
-                        "low": low_price,
-                        "close": current_price,
-                        "volume": 22,
-                    }
-                    data_desc.append(new_row_dict)
-                    for row in data_desc:
-                        # If the date is a string, convert it to a datetime object
-                        if isinstance(row["date"], str):
-                            row["date"] = datetime.strptime(row["date"], "%Y-%m-%d").date()
-
-                    # Now the sort will work perfectly
-                    data_desc.sort(key=lambda x: x["date"], reverse=True)
-
-            except Exception:
-                pass  # Fall back to historical data
-
-        data_asc = data_desc[::-1]
-        indicators_desc, _ = calculate_indicators(data_asc)
-
-        if not indicators_desc or len(indicators_desc) < 6:
-            return None
-
-        latest = indicators_desc[0]
-        previous = indicators_desc[1]
-
-        if (
-            latest["senkou_span_b"] is None
-            or latest["macd_hist"] is None
-            or previous["macd_hist"] is None
-        ):
-            return None
-
-        senkou_span_b = latest["senkou_span_b"]
-        latest_macd_hist = latest["macd_hist"]
-        previous_macd_hist = previous["macd_hist"]
-
-        cloud_bullish = current_price > senkou_span_b
-        cloud_bearish = current_price < senkou_span_b
-        macd_hist_increasing = latest_macd_hist > previous_macd_hist
-        macd_hist_decreasing = latest_macd_hist < previous_macd_hist
-
-        # Calculate MACD differences for last 5 days
-        macd_diffs = []
-        for i in range(5):
-            if i + 1 < len(indicators_desc):
-                curr = indicators_desc[i]["macd_hist"]
-                prev = indicators_desc[i + 1]["macd_hist"]
-                if curr is not None and prev is not None:
-                    macd_diffs.append(round(curr - prev, 4))
-                else:
-                    macd_diffs.append(0)
+                outcome[0] = finalize_stock(prepared, trend, color)
+            except Exception as e:
+                outcome[1], outcome[2] = "error", _describe(e)
+            outcome[3] += rules_share + time.perf_counter() - started
+
+    return [(item[0]["symbol"], *outcomes[item[0]["symbol"]]) for item in items]
+
+
+async def compute_stage(stock_list, histories, overlays, stats=None, deadline=None):
+    """Run indicators and rules for every loaded stock on the compute pool."""
+    stats = stats or ScreeningRunStats()
+    items = []
+    for stock in stock_list:
+        history = histories.get(stock["symbol"])
+        if history is None:
+            continue
+        if _bars(history) < MIN_HISTORY_DAYS:
+            stats.record_failure(
+                stock["symbol"], "history", "insufficient_history", f"{_bars(history)} rows"
+            )
+            continue
+        prices = overlays.get(stock["symbol"]) or _latest_prices(history)
+        items.append((stock, to_columns(history), *prices))
+
+    async def _compute(chunk):
+        batch = await run_compute(compute_batch, chunk)
+        # Outcomes are recorded as each batch lands so progress is visible mid-stage
+        computed = []
+        for symbol, result, reason, detail, seconds in batch:
+            stats.record_symbol_stage(symbol, "compute", seconds)
+            if result is None:
+                stats.record_failure(symbol, "compute", reason, detail)
             else:
-                macd_diffs.append(0)
+                stats.record_success(symbol)
+                computed.append(result)
+        return computed
+
+    chunks = _chunks(items, settings.SCREENING_COMPUTE_BATCH_SIZE)
+    batches = await _gather_limited(
+        settings.SCREENING_COMPUTE_WORKERS, [_compute(chunk) for chunk in chunks], deadline
+    )
+    results = []
+    for chunk, batch in zip(chunks, batches):
+        if isinstance(batch, DeadlineExceeded):
+            for item in chunk:
+                stats.record_timeout(item[0]["symbol"], "compute")
+        elif isinstance(batch, BaseException):
+            for item in chunk:
+                stats.record_failure(item[0]["symbol"], "compute", "error", _describe(batch))
+        else:
+            results.extend(batch)
+    return results
 
-        # Get MACD hist values for last 6 days
-        macd_hist_values = []
-        for i in range(6):
-            if i < len(indicators_desc) and indicators_desc[i]["macd_hist"] is not None:
-                macd_hist_values.append(
-                    {
-                        "day": i,
-                        "date": indicators_desc[i]["date"],
-                        "macd_hist": round(indicators_desc[i]["macd_hist"], 4),
-                        "close": round(indicators_desc[i]["close"], 2),
-                    }
-                )
-
-        if current_price > open_price:
-            intraday_strength_pct = (
-                ((high_price - current_price) / current_price) * 100
-                if current_price > 0
-                else 0
-            )
+
+def to_columns(data_desc):
+    """Compact descending (dates, opens, highs, lows, closes, volumes) form of a history.
+
+    Column views are reversed in place of being copied; rows are read into lists.
+    """
+    if isinstance(data_desc, dict):
+        return tuple(data_desc[key][::-1] for key in price_store.PRICE_COLUMNS)
+    return (
+        [row["date"] for row in data_desc],
+        [row["open"] for row in data_desc],
+        [row["high"] for row in data_desc],
+        [row["low"] for row in data_desc],
+        [row["close"] for row in data_desc],
+        [row["volume"] for row in data_desc],
+    )
+
+
+class ScreeningSkip(Exception):
+    """A stock that cannot be classified; args[0] is a short reason code."""
+
+
+def prepare_stock(stock, columns, current_price, high_price, low_price, open_price):
+    """Indicators for one stock (runs in the compute pool).
+
+    Raises ScreeningSkip when the stock has too little data to classify.
+    """
+    # Arrays (cached histories) become plain Python values, as rows read from the DB are
+    columns = [values.tolist() if isinstance(values, np.ndarray) else values for values in columns]
+    data_desc = [
+        {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for d, o, h, l, c, v in zip(*columns)
+    ]
+
+    data_asc = data_desc[::-1]
+    indicators_desc, _ = calculate_indicators(data_asc)
+
+    if not indicators_desc or len(indicators_desc) < 6:
+        raise ScreeningSkip("insufficient_indicators")
+
+    latest = indicators_desc[0]
+    previous = indicators_desc[1]
+
+    if (
+        latest["senkou_span_b"] is None
+        or latest["macd_hist"] is None
+        or previous["macd_hist"] is None
+    ):
+        raise ScreeningSkip("indicator_warmup")
+
+    return {
+        "stock": stock,
+        "data_desc": data_desc,
+        "indicators_desc": indicators_desc,
+        "prices": (current_price, high_price, low_price, open_price),
+    }
+
+
+def classify_prepared(prepared_list, rule_set: RuleSet):
+    """Evaluate the rule set for all prepared stocks in one vectorized pass."""
+    fields = [name for name in rule_set.fields if name != "price"]
+    series = []
+    for prepared in prepared_list:
+        recent = prepared["indicators_desc"][: rule_set.depth]
+        values = {name: [ind[name] for ind in recent] for name in fields}
+        values["price"] = [prepared["prices"][0]]
+        series.append(values)
+    ctx = SnapshotContext.from_series(series, rule_set.fields, rule_set.depth)
+    trends, colors = rule_set.classify(ctx)
+    return [(str(trend), str(color)) for trend, color in zip(trends, colors)]
+
+
+def finalize_stock(prepared, trend, color):
+    """MACD history, intraday strength and JSON serialization of a classified stock."""
+    stock = prepared["stock"]
+    symbol = stock["symbol"]
+    data_desc = prepared["data_desc"]
+    indicators_desc = prepared["indicators_desc"]
+    current_price, high_price, low_price, open_price = prepared["prices"]
+    latest = indicators_desc[0]
+    previous = indicators_desc[1]
+    senkou_span_b = latest["senkou_span_b"]
+    latest_macd_hist = latest["macd_hist"]
+    previous_macd_hist = previous["macd_hist"]
+
+    # Calculate MACD differences for last 5 days
+    macd_diffs = []
+    for i in range(5):
+        if i + 1 < len(indicators_desc):
+            curr = indicators_desc[i]["macd_hist"]
+            prev = indicators_desc[i + 1]["macd_hist"]
+            if curr is not None and prev is not None:
+                macd_diffs.append(round(curr - prev, 4))
+            else:
+                macd_diffs.append(0)
         else:
-            intraday_strength_pct = (
-                ((current_price - low_price) / current_price) * 100
-                if current_price > 0
-                else 0
+            macd_diffs.append(0)
+
+    # Get MACD hist values for last 6 days
+    macd_hist_values = []
+    for i in range(6):
+        if i < len(indicators_desc) and indicators_desc[i]["macd_hist"] is not None:
+            macd_hist_values.append(
+                {
+                    "day": i,
+                    "date": indicators_desc[i]["date"],
+                    "macd_hist": round(indicators_desc[i]["macd_hist"], 4),
+                    "close": round(indicators_desc[i]["close"], 2),
+                }
             )
 
-        # Additional Ichimoku checks for 26 periods ago
-        ichimoku_bullish_pass = False
-        ichimoku_bearish_pass = False
-        if len(indicators_desc) > 26:
-            cloud_a_26 = indicators_desc[26]["senkou_span_a"]
-            cloud_b_26 = indicators_desc[26]["senkou_span_b"]
-            candle_26_close = indicators_desc[26]["close"]
-            chikou_span = latest["chikou_span"]
-
-            # Bullish checks
-            cloud_color_bullish_26 = cloud_a_26 > cloud_b_26 if cloud_a_26 and cloud_b_26 else False
-            cloud_position_bullish_26 = current_price > cloud_a_26 and current_price > cloud_b_26 if cloud_a_26 and cloud_b_26 else False
-            chikou_above = chikou_span > candle_26_close if chikou_span and candle_26_close else False
-            ichimoku_bullish_pass = cloud_position_bullish_26 and cloud_color_bullish_26 and chikou_above
-
-            # Bearish checks
-            cloud_color_bearish_26 = cloud_b_26 > cloud_a_26 if cloud_a_26 and cloud_b_26 else False
-            cloud_position_bearish_26 = current_price < cloud_a_26 and current_price < cloud_b_26 if cloud_a_26 and cloud_b_26 else False
-            chikou_below = chikou_span < candle_26_close if chikou_span and candle_26_close else False
-            ichimoku_bearish_pass = cloud_position_bearish_26 and cloud_color_bearish_26 and chikou_below
-
-        # MACD check: Histogram or Signal Line > 0
-        macd_positive = (latest_macd_hist > 0 and (latest["macd_signal"] and latest["macd_signal"] > 0))
-
-        # MACD check for bearish: Histogram or Signal Line < 0
-        macd_negative = (latest_macd_hist < 0 and (latest["macd_signal"] and latest["macd_signal"] < 0))
-
-        if cloud_bullish and macd_positive and macd_hist_increasing and ichimoku_bullish_pass and latest['close'] > latest['open']:
-            trend, color = "Bullish", "green"
-        elif cloud_bearish and macd_negative and macd_hist_decreasing and ichimoku_bearish_pass and latest['close'] < latest['open']:
-            trend, color = "Bearish", "red"
-        else:
-            trend, color = "Neutral/Mixed", "gray"
-
-        # Serialize dates to strings for JSON response
-        serialized_indicators = []
-        for ind in indicators_desc:
-            d = dict(ind)
-            if isinstance(d.get("date"), date):
-                d["date"] = d["date"].isoformat()
-            serialized_indicators.append(d)
-
-        serialized_raw = []
-        for rd in data_desc:
-            d = dict(rd)
-            if isinstance(d.get("date"), date):
-                d["date"] = d["date"].isoformat()
-            serialized_raw.append(d)
-
-        serialized_macd_hist = []
-        for mv in macd_hist_values:
-            d = dict(mv)
-            if isinstance(d.get("date"), date):
-                d["date"] = d["date"].isoformat()
-            serialized_macd_hist.append(d)
-
-        return {
-            "symbol": symbol,
-            "name": stock["name"],
-            "current_price": round(current_price, 2),
-            "high_price": round(high_price, 2),
-            "low_price": round(low_price, 2),
-            "senkou_span_b": round(senkou_span_b, 2),
-            "macd_hist": round(latest_macd_hist, 4),
-            "prev_macd_hist": round(previous_macd_hist, 4),
-            "trend": trend,
-            "color": color,
-            "macd_diffs_5d": macd_diffs,
-            "macd_hist_values": serialized_macd_hist,
-            "intraday_strength_pct": round(intraday_strength_pct, 4),
-            "indicators": serialized_indicators,
-            "raw_data": serialized_raw,
-            "last_updated": now_ist().strftime("%H:%M:%S"),
-        }
-    except Exception:
-        return None
+    if current_price > open_price:
+        intraday_strength_pct = (
+            ((high_price - current_price) / current_price) * 100
+            if current_price > 0
+            else 0
+        )
+    else:
+        intraday_strength_pct = (
+            ((current_price - low_price) / current_price) * 100
+            if current_price > 0
+            else 0
+        )
+
+    # Serialize dates to strings for JSON response
+    serialized_indicators = []
+    for ind in indicators_desc:
+        d = dict(ind)
+        if isinstance(d.get("date"), date):
+            d["date"] = d["date"].isoformat()
+        serialized_indicators.append(d)
+
+    serialized_raw = []
+    for rd in data_desc:
+        d = dict(rd)
+        if isinstance(d.get("date"), date):
+            d["date"] = d["date"].isoformat()
+        serialized_raw.append(d)
+
+    serialized_macd_hist = []
+    for mv in macd_hist_values:
+        d = dict(mv)
+        if isinstance(d.get("date"), date):
+            d["date"] = d["date"].isoformat()
+        serialized_macd_hist.append(d)
+
+    return {
+        "symbol": symbol,
+        "name": stock["name"],
+        "current_price": round(current_price, 2),
+        "high_price": round(high_price, 2),
+        "low_price": round(low_price, 2),
+        "senkou_span_b": round(senkou_span_b, 2),
+        "macd_hist": round(latest_macd_hist, 4),
+        "prev_macd_hist": round(previous_macd_hist, 4),
+        "trend": trend,
+        "color": color,
+        "macd_diffs_5d": macd_diffs,
+        "macd_hist_values": serialized_macd_hist,
+        "intraday_strength_pct": round(intraday_strength_pct, 4),
+        "indicators": serialized_indicators,
+        "raw_data": serialized_raw,
+        "last_updated": now_ist().strftime("%H:%M:%S"),
+    }
 
 
 async def screen_stocks(
@@ -221,22 +522,236 @@ async def screen_stocks(
     use_live_data,
     intraday_interval,
     use_mock=False,
+    stats: ScreeningRunStats | None = None,
+    deadline_seconds: float | None = None,
+    as_of: str | None = None,
 ):
-    """Screen stocks using async concurrency (replaces ThreadPoolExecutor)."""
-    semaphore = asyncio.Semaphore(50)
-
-    async def _fetch_with_semaphore(stock):
-        async with semaphore:
-            return await fetch_single_stock_data(
-                stock, api, use_live_data, intraday_interval, use_mock
-            )
+    """Screen stocks through the history -> live -> compute stages.
+
+    Stage and per-symbol timings, history sources and failures are recorded on
+    ``stats``; the caller finishes the run (see build_screening_response).
+
+    With ``deadline_seconds`` the run returns once that budget is spent: pending
+    work is cancelled and the affected symbols are recorded as timed out. The
+    I/O stages stop SCREENING_DEADLINE_COMPUTE_RESERVE seconds early so that
+    whatever was loaded can still be computed.
+
+    With ``as_of`` (YYYY-MM-DD) the run sees stored history up to that date only:
+    no mock data, API fallback or live overlay.
+    """
+    if as_of:
+        use_mock = use_live_data = False
+    stats = stats or ScreeningRunStats(
+        "as_of" if as_of else "mock" if use_mock else "live" if use_live_data else "db"
+    )
+    deadline = io_deadline = None
+    if deadline_seconds is not None:
+        deadline = asyncio.get_running_loop().time() + deadline_seconds
+        io_deadline = deadline - min(
+            settings.SCREENING_DEADLINE_COMPUTE_RESERVE, deadline_seconds / 2
+        )
+
+    live = use_live_data and not use_mock
+    stats.plan_stages(("history", "live", "compute") if live else ("history", "compute"))
+    stats.start_stage("history")
+    started = time.perf_counter()
+    histories = await load_history_stage(stock_list, api, use_mock, stats, io_deadline, as_of)
+    stats.record_stage("history", time.perf_counter() - started)
+
+    overlays = {}
+    if live:
+        stats.start_stage("live")
+        started = time.perf_counter()
+        overlays = await live_overlay_stage(
+            stock_list, api, histories, intraday_interval, stats, io_deadline
+        )
+        stats.record_stage("live", time.perf_counter() - started)
+
+    stats.start_stage("compute")
+    started = time.perf_counter()
+    results = await compute_stage(stock_list, histories, overlays, stats, deadline)
+    stats.record_stage("compute", time.perf_counter() - started)
+    return results
 
-    tasks = [_fetch_with_semaphore(stock) for stock in stock_list]
-    raw_results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    results = []
-    for r in raw_results:
-        if isinstance(r, dict) and r is not None:
-            results.append(r)
+async def fetch_single_stock_data(
+    stock, api: UpstoxAPI, use_live_data, intraday_interval, use_mock=False, as_of=None
+):
+    """Screen one stock through the same stages as a full run.
+
+    Returns (result, failure): failure is the {"stage", "reason", "detail"} the
+    stages recorded when the stock could not be screened. An error that stops
+    the run is recorded the same way and re-raised.
+    """
+    symbol = stock["symbol"]
+    stats = ScreeningRunStats(
+        "as_of" if as_of else "mock" if use_mock else "live" if use_live_data else "db",
+        {"symbol": symbol},
+    )
+    try:
+        results = await screen_stocks(
+            [stock], api, use_live_data, intraday_interval, use_mock, stats=stats, as_of=as_of
+        )
+    except Exception as e:
+        stats.record_failure(symbol, stats.current_stage or "history", "error", _describe(e))
+        raise
+    if results:
+        return results[0], None
+    return None, stats.symbols.get(symbol, {}).get("failure")
+
+
+# --- Stage 4: publish ---
+def build_screening_response(
+    results, stats: ScreeningRunStats | None = None, previous: dict | None = None
+) -> dict:
+    """Group results by trend (sorted by intraday strength) into the response payload.
+
+    Symbols that timed out are filled from ``previous`` (the last published
+    response of the same mode) and flagged ``stale``. Also records the publish
+    stage and finishes ``stats`` when given.
+    """
+    if stats is not None:
+        stats.start_stage("publish")
+    started = time.perf_counter()
+    timed_out = sorted(stats.timed_out) if stats is not None else []
+    mode = stats.mode if stats is not None else ""
+    if timed_out and previous and previous.get("mode") == mode:
+        last_known = {
+            r["symbol"]: r
+            for group in ("bullish", "bearish", "neutral")
+            for r in previous.get(group, [])
+        }
+        for symbol in timed_out:
+            if symbol in last_known:
+                results.append({**last_known[symbol], "stale": True})
+
+    bullish = [r for r in results if r["trend"] == "Bullish"]
+    bearish = [r for r in results if r["trend"] == "Bearish"]
+    neutral = [r for r in results if r["trend"] == "Neutral/Mixed"]
+
+    # Sort by intraday strength
+    bullish.sort(key=lambda x: x["intraday_strength_pct"], reverse=False)
+    bearish.sort(key=lambda x: x["intraday_strength_pct"], reverse=False)
+
+    response = ScreeningResponse(
+        bullish=bullish,
+        bearish=bearish,
+        neutral=neutral,
+        total=len(results),
+        timestamp=now_ist().strftime("%Y-%m-%d %H:%M:%S"),
+        mode=mode,
+        partial=bool(timed_out),
+        timed_out=timed_out,
+        as_of=stats.params.get("as_of") if stats is not None else None,
+    ).model_dump()
+    if stats is not None:
+        stats.record_stage("publish", time.perf_counter() - started)
+        stats.finish()
+        response["stage_timings"] = dict(stats.stage_timings)
+    return response
+
+
+# --- Point-in-time batch ---
+AS_OF_MAX_DAYS = 92
+_GROUPS = {"Bullish": "bullish", "Bearish": "bearish"}
+
+
+def classify_as_of_dates(columns_by_symbol, as_of_dates, rule_set_name=None):
+    """Screen every symbol on every as-of date from stored history (runs in the compute pool).
+
+    ``columns_by_symbol`` maps symbol -> ascending (dates, opens, highs, lows,
+    closes). For each date, a symbol is screened on the HISTORY_DAYS rows ending
+    at its last row on or before that date, exactly as an ``as_of`` run would.
+    All windows are stacked into one panel, so a month of dates is a single
+    vectorized indicator and rule pass rather than one run per date.
+    """
+    targets = np.array(as_of_dates, dtype="datetime64[D]")
+    days = {
+        d: {"date": d, "bullish": [], "bearish": [], "neutral": [], "skipped": []}
+        for d in as_of_dates
+    }
+    windows = {"open": [], "high": [], "low": [], "close": []}
+    owners = []
+    for symbol, (dates, *prices) in columns_by_symbol.items():
+        ends = np.searchsorted(np.array(dates, dtype="datetime64[D]"), targets, side="right") - 1
+        present = ends >= 0
+        for key, values in zip(windows, prices):
+            padded = np.concatenate(
+                [np.full(HISTORY_DAYS - 1, np.nan), np.asarray(values, dtype=float)]
+            )
+            windows[key].append(sliding_window_view(padded, HISTORY_DAYS)[ends[present]])
+        for i, end in enumerate(ends):
+            if end >= 0:
+                owners.append((symbol, as_of_dates[i], str(dates[end])))
+            else:
+                days[as_of_dates[i]]["skipped"].append(symbol)
+
+    if owners:
+        opens, highs, lows, closes = (np.concatenate(windows[key]) for key in windows)
+        panel = indicator_panel(opens, highs, lows, closes)
+        codes, labels = classify_panel(panel, rule_set_name)
+        for i, (symbol, as_of_date, last_date) in enumerate(owners):
+            code = codes[i, -1]
+            if code < 0:
+                days[as_of_date]["skipped"].append(symbol)
+                continue
+            close, high, low, open_ = closes[i, -1], highs[i, -1], lows[i, -1], opens[i, -1]
+            if close > open_:
+                strength = ((high - close) / close) * 100 if close > 0 else 0
+            else:
+                strength = ((close - low) / close) * 100 if close > 0 else 0
+            days[as_of_date][_GROUPS.get(labels[code], "neutral")].append(
+                {
+                    "symbol": symbol,
+                    "trend": labels[code],
+                    "last_date": last_date,
+                    "current_price": round(float(close), 2),
+                    "senkou_span_b": round(float(panel["senkou_span_b"][i, -1]), 2),
+                    "macd_hist": round(float(panel["macd_hist"][i, -1]), 4),
+                    "prev_macd_hist": round(float(panel["macd_hist"][i, -2]), 4),
+                    "intraday_strength_pct": round(float(strength), 4),
+                }
+            )
 
-    return results
+    for day in days.values():
+        for group in ("bullish", "bearish"):
+            day[group].sort(key=lambda x: x["intraday_strength_pct"], reverse=False)
+        day["total"] = len(day["bullish"]) + len(day["bearish"]) + len(day["neutral"])
+    return [days[d] for d in as_of_dates]
+
+
+async def screen_as_of_range(stock_list, start: str, end: str) -> dict:
+    """Point-in-time screening for every trading date in [start, end] from one history load."""
+    started = time.perf_counter()
+    span = (date.fromisoformat(end) - date.fromisoformat(start)).days
+    pool = await get_pool()
+    histories = await price_store.load_latest_columns(
+        pool,
+        [stock["symbol"] for stock in stock_list],
+        # Trading days in the span never exceed calendar days
+        HISTORY_DAYS + span + 1,
+        as_of=end,
+    )
+    columns_by_symbol = {}
+    trading_dates = set()
+    first, last = np.datetime64(start, "D"), np.datetime64(end, "D")
+    for symbol, columns in histories.items():
+        dates = np.asarray(columns["date"], dtype="datetime64[D]")
+        columns_by_symbol[symbol] = (
+            dates,
+            columns["open"],
+            columns["high"],
+            columns["low"],
+            columns["close"],
+        )
+        trading_dates.update(dates[(dates >= first) & (dates <= last)].astype(str))
+
+    as_of_dates = sorted(trading_dates)
+    days = await run_compute(classify_as_of_dates, columns_by_symbol, as_of_dates) if as_of_dates else []
+    return {
+        "start": start,
+        "end": end,
+        "symbols": len(columns_by_symbol),
+        "days": days,
+        "elapsed": round(time.perf_counter() - started, 4),
+    }
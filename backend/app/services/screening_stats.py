@@ -0,0 +1,211 @@
+"""
+Screening Stats - per-run timing and outcome records for the screening pipeline.
+
+Every run gets a ScreeningRunStats that the stages fill in: where each symbol's
+history came from (db / api / mock), per-symbol stage durations and, for dropped
+symbols, the stage and reason. Finished runs feed the process-wide Prometheus
+metrics and a short in-memory history served on /api/screening/stats.
+"""
+import itertools
+import time
+from collections import Counter as TallyCounter, deque
+
+from app.core.metrics import registry
+from app.core.timezone import now_ist
+
+RECENT_RUNS = 20
+RUN_DURATION_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+runs_total = registry.counter(
+    "screening_runs_total", "Completed screening runs", ("mode",)
+)
+run_duration = registry.histogram(
+    "screening_run_duration_seconds",
+    "End-to-end screening run duration",
+    ("mode",),
+    buckets=RUN_DURATION_BUCKETS,
+)
+stage_duration = registry.histogram(
+    "screening_stage_duration_seconds", "Screening pipeline stage duration", ("stage",)
+)
+symbol_stage_duration = registry.histogram(
+    "screening_symbol_stage_duration_seconds",
+    "Per-symbol duration within a screening stage",
+    ("stage",),
+)
+history_source_total = registry.counter(
+    "screening_history_source_total",
+    "Where each symbol's daily history came from (db = cache hit)",
+    ("source",),
+)
+symbol_failures_total = registry.counter(
+    "screening_symbol_failures_total", "Symbols dropped from a screening run", ("stage", "reason")
+)
+symbol_timeouts_total = registry.counter(
+    "screening_symbol_timeouts_total", "Symbols still pending when the run deadline expired", ("stage",)
+)
+live_overlay_misses_total = registry.counter(
+    "screening_live_overlay_misses_total",
+    "Symbols that fell back to daily history because the live overlay failed",
+)
+symbols_screened_total = registry.counter(
+    "screening_symbols_screened_total", "Symbols classified by a screening run"
+)
+
+_run_ids = itertools.count(1)
+_recent_runs: deque = deque(maxlen=RECENT_RUNS)
+
+
+class ScreeningRunStats:
+    """Timing and outcome record for one screening run."""
+
+    def __init__(self, mode: str = "mock", params: dict | None = None):
+        self.run_id = next(_run_ids)
+        self.mode = mode
+        self.params = params or {}
+        self.started_at = now_ist().strftime("%Y-%m-%d %H:%M:%S")
+        self._started = time.perf_counter()
+        self.duration = None
+        self.stage_timings: dict[str, float] = {}
+        self.symbols: dict[str, dict] = {}
+        self.current_stage: str | None = None
+        # Per-symbol stages this run goes through, in order (see plan_stages)
+        self.planned_stages: tuple[str, ...] = ()
+
+    def _symbol(self, symbol: str) -> dict:
+        entry = self.symbols.get(symbol)
+        if entry is None:
+            entry = self.symbols[symbol] = {"source": None, "stages": {}, "status": "pending"}
+        return entry
+
+    def plan_stages(self, stages):
+        self.planned_stages = tuple(stages)
+
+    def start_stage(self, stage: str):
+        self.current_stage = stage
+
+    def record_stage(self, stage: str, seconds: float):
+        self.stage_timings[stage] = round(seconds, 4)
+        stage_duration.observe(seconds, stage=stage)
+
+    def record_symbol_stage(self, symbol: str, stage: str, seconds: float):
+        self._symbol(symbol)["stages"][stage] = round(seconds, 4)
+        symbol_stage_duration.observe(seconds, stage=stage)
+
+    def record_source(self, symbol: str, source: str):
+        self._symbol(symbol)["source"] = source
+        history_source_total.inc(source=source)
+
+    def record_live_miss(self, symbol: str, error: str | None):
+        self._symbol(symbol)["live_error"] = error
+        live_overlay_misses_total.inc()
+
+    def record_timeout(self, symbol: str, stage: str):
+        entry = self._symbol(symbol)
+        entry["status"] = "timed_out"
+        entry["failure"] = {"stage": stage, "reason": "deadline", "detail": None}
+        symbol_timeouts_total.inc(stage=stage)
+
+    @property
+    def timed_out(self) -> list[str]:
+        return [symbol for symbol, entry in self.symbols.items() if entry["status"] == "timed_out"]
+
+    def record_success(self, symbol: str):
+        self._symbol(symbol)["status"] = "ok"
+        symbols_screened_total.inc()
+
+    def record_failure(self, symbol: str, stage: str, reason: str, detail: str | None = None):
+        entry = self._symbol(symbol)
+        entry["status"] = "failed"
+        entry["failure"] = {"stage": stage, "reason": reason, "detail": detail}
+        symbol_failures_total.inc(stage=stage, reason=reason)
+
+    @property
+    def completed(self) -> int:
+        """Symbols that reached a final outcome (classified, dropped or timed out)."""
+        return sum(1 for entry in self.symbols.values() if entry["status"] != "pending")
+
+    @property
+    def stage_work(self) -> int:
+        """Per-symbol steps of the planned stages finished so far.
+
+        A symbol with a final outcome counts all its planned stages as done, so
+        dropped symbols do not hold progress back.
+        """
+        stages = self.planned_stages
+        done = 0
+        for entry in self.symbols.values():
+            if entry["status"] != "pending":
+                done += len(stages)
+            else:
+                done += sum(1 for stage in stages if stage in entry["stages"])
+        return done
+
+    @property
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self._started
+
+    def finish(self):
+        """Close the run and publish it to the recent-runs history."""
+        self.current_stage = "done"
+        self.duration = time.perf_counter() - self._started
+        runs_total.inc(mode=self.mode)
+        run_duration.observe(self.duration, mode=self.mode)
+        _recent_runs.append(self)
+
+    def summary(self, include_symbols: bool = False) -> dict:
+        statuses = TallyCounter(entry["status"] for entry in self.symbols.values())
+        sources = TallyCounter(entry["source"] for entry in self.symbols.values() if entry["source"])
+        failures = {
+            symbol: entry["failure"]
+            for symbol, entry in self.symbols.items()
+            if entry["status"] in ("failed", "timed_out")
+        }
+        summary = {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "params": self.params,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 4) if self.duration is not None else None,
+            "stage_timings": self.stage_timings,
+            "symbols": len(self.symbols),
+            "screened": statuses.get("ok", 0),
+            "failed": statuses.get("failed", 0),
+            "timed_out": statuses.get("timed_out", 0),
+            "history_sources": dict(sources),
+            "failures": failures,
+        }
+        if include_symbols:
+            summary["per_symbol"] = self.symbols
+        return summary
+
+
+def get_stats() -> dict:
+    """Aggregate view over recent runs, plus full per-symbol detail of the latest one."""
+    runs = list(_recent_runs)
+    durations = sorted(run.duration for run in runs)
+    failure_reasons = TallyCounter()
+    for run in runs:
+        for failure in run.summary()["failures"].values():
+            failure_reasons[f"{failure['stage']}:{failure['reason']}"] += 1
+
+    def _percentile(q):
+        if not durations:
+            return None
+        return round(durations[min(len(durations) - 1, int(q * len(durations)))], 4)
+
+    return {
+        "runs": len(runs),
+        "duration": {
+            "min": round(durations[0], 4) if durations else None,
+            "p50": _percentile(0.5),
+            "p95": _percentile(0.95),
+            "max": round(durations[-1], 4) if durations else None,
+        },
+        "run_duration_histogram": {
+            mode: run_duration.snapshot(mode=mode) for mode in sorted({run.mode for run in runs})
+        },
+        "failure_reasons": dict(failure_reasons),
+        "latest": runs[-1].summary(include_symbols=True) if runs else None,
+        "recent": [run.summary() for run in reversed(runs)],
+    }
@@ -0,0 +1,64 @@
+"""
+Signal Events - trend transitions between consecutive screening runs.
+
+Each published run is diffed against the previous snapshot of the same mode
+with one dict lookup per symbol; only symbols whose trend changed are written
+to the signal_events table, so "all Bullish flips today" is an index scan
+instead of a rerun.
+"""
+from app.core.metrics import registry
+from app.core.timezone import now_ist
+from app.database import get_pool
+from app.repositories import signal_repository
+
+GROUPS = ("bullish", "bearish", "neutral")
+
+transitions_total = registry.counter(
+    "screening_signal_transitions_total", "Trend transitions detected between runs", ("trend",)
+)
+
+
+def diff_snapshots(previous: dict | None, current: dict, run_id: int | None = None) -> list[dict]:
+    """Trend changes from ``previous`` to ``current`` (screening responses of the same mode).
+
+    Symbols served stale from an earlier run, or absent from either snapshot,
+    produce no event.
+    """
+    if not previous or previous.get("mode") != current.get("mode"):
+        return []
+    before = {r["symbol"]: r["trend"] for group in GROUPS for r in previous.get(group, [])}
+    occurred_at = now_ist()
+    events = []
+    for group in GROUPS:
+        for result in current.get(group, []):
+            previous_trend = before.get(result["symbol"])
+            if result.get("stale") or previous_trend is None or previous_trend == result["trend"]:
+                continue
+            events.append(
+                {
+                    "symbol": result["symbol"],
+                    "previous_trend": previous_trend,
+                    "trend": result["trend"],
+                    "price": result["current_price"],
+                    "macd_hist": result["macd_hist"],
+                    "mode": current.get("mode"),
+                    "run_id": run_id,
+                    "occurred_at": occurred_at,
+                }
+            )
+    return events
+
+
+async def record_transitions(previous: dict | None, current: dict, run_id: int | None = None) -> int:
+    """Diff two snapshots and persist the transitions; returns how many were found."""
+    events = diff_snapshots(previous, current, run_id)
+    if not events:
+        return 0
+    for event in events:
+        transitions_total.inc(trend=event["trend"])
+    try:
+        pool = await get_pool()
+    except Exception:
+        return len(events)  # No database (e.g. mock-only setups); the run still publishes
+    await signal_repository.save_signal_events(pool, events)
+    return len(events)
@@ -0,0 +1,171 @@
+"""
+Snapshot Store - the latest screening response, shared by all workers and restarts.
+
+Published runs are msgpack-encoded, brotli-compressed (roughly a sixth of their
+JSON size) and upserted into screening_snapshots with an increasing version.
+Each write is announced on the invalidation bus (SNAPSHOT_TOPIC); every uvicorn
+worker follows the topic and loads the new version, so all workers serve the same results. The app lifespan
+also loads the snapshot before accepting traffic, so /api/screening/results has
+data right after a deploy or crash.
+
+A run takes a Postgres advisory lock on its run key (compute_lock), so when
+several workers receive the same request only one scans; the others wait for
+its announcement (wait_for_version) and serve the published snapshot.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import brotli
+import msgpack
+
+from app.core.invalidation import bus
+from app.core.timezone import now_ist
+from app.database import get_pool
+from app.repositories import snapshot_repository
+
+SNAPSHOT_NAME = "latest"
+SNAPSHOT_TOPIC = "screening_snapshot"
+ENCODING = "msgpack+br"
+BROTLI_QUALITY = 4  # ~0.2s for a full 211-stock response; higher levels cost more than they save
+
+# Latest version announced on SNAPSHOT_TOPIC, and the event waiters block on
+_announced = {"version": 0, "run_key": None}
+_announcement = asyncio.Event()
+_resync_tasks: set[asyncio.Task] = set()
+
+
+def encode_snapshot(response: dict) -> bytes:
+    return brotli.compress(msgpack.packb(response, use_bin_type=True, default=str), quality=BROTLI_QUALITY)
+
+
+def decode_snapshot(payload: bytes) -> dict:
+    return msgpack.unpackb(brotli.decompress(payload), raw=False)
+
+
+async def publish(response: dict, run_key: str | None = None) -> int | None:
+    """Store ``response`` as the latest snapshot and notify all workers; returns its version."""
+    try:
+        pool = await get_pool()
+    except Exception:
+        return None  # No database (e.g. mock-only setups)
+    # Taken before encoding so a slower save of an older run cannot overwrite a newer one
+    created_at = now_ist()
+    payload = await asyncio.to_thread(encode_snapshot, response)
+    version = await snapshot_repository.save_snapshot(
+        pool,
+        SNAPSHOT_NAME,
+        response.get("mode", ""),
+        ENCODING,
+        payload,
+        created_at,
+        run_key,
+    )
+    if version is not None:
+        await bus.publish(pool, SNAPSHOT_TOPIC, data={"version": version, "run_key": run_key})
+    return version
+
+
+async def load() -> dict | None:
+    """The latest stored snapshot, decoded and stamped with its version; None if unavailable."""
+    try:
+        pool = await get_pool()
+    except Exception:
+        return None
+    record = await snapshot_repository.get_snapshot(pool, SNAPSHOT_NAME)
+    if record is None or record["encoding"] != ENCODING:
+        return None
+    try:
+        snapshot = await asyncio.to_thread(decode_snapshot, record["payload"])
+    except Exception:
+        return None
+    snapshot["version"] = record["version"]
+    return snapshot
+
+
+async def info() -> dict | None:
+    """Version, run key and age (seconds) of the stored snapshot, without loading it."""
+    try:
+        pool = await get_pool()
+    except Exception:
+        return None
+    return await snapshot_repository.get_snapshot_info(pool, SNAPSHOT_NAME)
+
+
+@asynccontextmanager
+async def compute_lock(run_key: str):
+    """Cluster-wide lock for computing ``run_key``; yields True if this worker holds it.
+
+    Without a database there is nobody to coordinate with, so the lock is granted.
+    """
+    try:
+        pool = await get_pool()
+        conn = await pool.acquire()
+    except Exception:
+        yield True
+        return
+    try:
+        locked = await conn.fetchval("SELECT pg_try_advisory_lock(hashtext($1))", run_key)
+        try:
+            yield locked
+        finally:
+            if locked:
+                await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", run_key)
+    finally:
+        await pool.release(conn)
+
+
+def announced_version() -> int:
+    """Latest snapshot version this worker has been told about."""
+    return _announced["version"]
+
+
+async def wait_for_version(run_key: str, after_version: int, timeout: float) -> int | None:
+    """Wait until a snapshot newer than ``after_version`` is announced for ``run_key``."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        if _announced["version"] > after_version and _announced["run_key"] == run_key:
+            return _announced["version"]
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        try:
+            await asyncio.wait_for(_announcement.wait(), remaining)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _announce(version: int, run_key: str | None):
+    global _announcement
+    if version <= _announced["version"]:
+        return
+    _announced.update(version=version, run_key=run_key)
+    # Wake current waiters; later ones wait on a fresh event
+    _announcement.set()
+    _announcement = asyncio.Event()
+
+
+async def _resync(on_version):
+    current = await info()
+    if current is not None:
+        _announce(current["version"], current["run_key"])
+        on_version(current["version"])
+
+
+def follow(on_version):
+    """Run ``on_version(version)`` for every snapshot published by any worker.
+
+    Announcements arrive on the invalidation bus. When the bus reconnects it
+    resets the topic, and the stored version is read back in case one was missed.
+    """
+
+    def _published(key, data):
+        if data is None:
+            task = asyncio.create_task(_resync(on_version))
+            _resync_tasks.add(task)
+            task.add_done_callback(_resync_tasks.discard)
+            return
+        _announce(data["version"], data.get("run_key"))
+        on_version(data["version"])
+
+    bus.subscribe(SNAPSHOT_TOPIC, _published)
@@ -1,5 +1,5 @@
 import client from './client';
-import type { ScreeningResponse, ScreeningResult } from '../types/stock';
+import type { ScreeningJobStatus, ScreeningResponse, ScreeningResult } from '../types/stock';
 
 export const runScreening = (useMock = true, useLiveData = false, intradayInterval = 1) =>
   client.post<ScreeningResponse>('/screening/run', null, {
@@ -13,3 +13,14 @@ export const screenSingleStock = (symbol: string, useMock = true) =>
   client.get<ScreeningResult>(`/screening/stock/${symbol}`, {
     params: { use_mock: useMock },
   }).then(r => r.data);
+
+export const submitScreeningJob = (useMock = true, useLiveData = false, intradayInterval = 1, fresh = false) =>
+  client.post<ScreeningJobStatus>('/screening/jobs', null, {
+    params: { use_mock: useMock, use_live_data: useLiveData, intraday_interval: intradayInterval, fresh },
+  }).then(r => r.data);
+
+export const getScreeningJob = (jobId: string) =>
+  client.get<ScreeningJobStatus>(`/screening/jobs/${jobId}`).then(r => r.data);
+
+export const getScreeningJobResult = (jobId: string) =>
+  client.get<ScreeningResponse>(`/screening/jobs/${jobId}/result`).then(r => r.data);
@@ -4,7 +4,7 @@ export default function Sidebar() {
   const {
     useMock, useLiveData, intradayInterval, loading,
     setUseMock, setUseLiveData, setIntradayInterval, runScreening,
-    bullish, bearish, neutral, timestamp,
+    bullish, bearish, neutral, timestamp, shared,
   } = useScreeningStore();
 
   return (
@@ -34,7 +34,7 @@ export default function Sidebar() {
       </div>
 
       <button
-        onClick={runScreening}
+        onClick={() => runScreening(true)}
         disabled={loading}
         className="w-full rounded-lg bg-blue-600 px-4 py-2 text-sm font-medium text-white hover:bg-blue-700 disabled:opacity-50"
       >
@@ -46,7 +46,12 @@ export default function Sidebar() {
         <p className="text-green-600">Bullish: {bullish.length}</p>
         <p className="text-red-600">Bearish: {bearish.length}</p>
         <p className="text-gray-500">Neutral: {neutral.length}</p>
-        {timestamp && <p className="mt-1 text-xs text-gray-400">Last: {timestamp}</p>}
+        {timestamp && (
+          <p className="mt-1 text-xs text-gray-400">
+            Last: {timestamp}
+            {shared && ' (shared snapshot)'}
+          </p>
+        )}
       </div>
     </aside>
   );
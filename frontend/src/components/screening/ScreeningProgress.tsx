@@ -1,8 +1,22 @@
-export default function ScreeningProgress() {
+import type { ScreeningJobStatus } from '../../types/stock';
+
+interface Props {
+  job?: ScreeningJobStatus | null;
+}
+
+export default function ScreeningProgress({ job }: Props) {
   return (
     <div className="flex flex-col items-center justify-center py-16">
       <div className="h-12 w-12 animate-spin rounded-full border-4 border-blue-500 border-t-transparent" />
-      <p className="mt-4 text-gray-600">Screening 211 stocks...</p>
+      <p className="mt-4 text-gray-600">
+        {job ? `Screening ${job.done} of ${job.total} stocks...` : 'Screening stocks...'}
+      </p>
+      {job?.stage && (
+        <p className="text-sm text-gray-500">
+          Stage: {job.stage} · {Math.round(job.progress * 100)}%
+          {job.eta_seconds != null && ` · ~${Math.ceil(job.eta_seconds)}s remaining`}
+        </p>
+      )}
       <p className="text-sm text-gray-400">Analyzing Ichimoku Cloud + MACD indicators</p>
     </div>
   );
@@ -9,7 +9,7 @@ import ScreeningProgress from '../components/screening/ScreeningProgress';
 import BuyDialog from '../components/trading/BuyDialog';
 
 export default function ScreeningPage() {
-  const { bullish, bearish, neutral, loading, expandMode, fetchCachedResults, runScreening } = useScreeningStore();
+  const { bullish, bearish, neutral, loading, job, expandMode, fetchCachedResults, runScreening } = useScreeningStore();
   const [autoRefresh, setAutoRefresh] = useState(false);
   const [showBuyDialog, setShowBuyDialog] = useState(false);
 
@@ -51,7 +51,7 @@ export default function ScreeningPage() {
 
         {/* Main content */}
         {loading ? (
-          <ScreeningProgress />
+          <ScreeningProgress job={job} />
         ) : (
           <div className="mt-3 grid flex-1 grid-cols-3 gap-4 overflow-hidden">
             <StockColumn title="Bullish" stocks={bullish} color="green" expanded={isBullishExpanded} />
@@ -1,20 +1,25 @@
 import { create } from 'zustand';
-import type { ScreeningResult } from '../types/stock';
+import type { ScreeningJobStatus, ScreeningResult } from '../types/stock';
 import * as screeningApi from '../api/screening';
 
+const JOB_POLL_MS = 1000;
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
 interface ScreeningState {
   bullish: ScreeningResult[];
   bearish: ScreeningResult[];
   neutral: ScreeningResult[];
   total: number;
   timestamp: string;
+  shared: boolean;
   loading: boolean;
+  job: ScreeningJobStatus | null;
   error: string | null;
   useMock: boolean;
   useLiveData: boolean;
   intradayInterval: number;
   expandMode: 'none' | 'all' | 'bullish' | 'bearish';
-  runScreening: () => Promise<void>;
+  runScreening: (fresh?: boolean) => Promise<void>;
   fetchCachedResults: () => Promise<void>;
   setUseMock: (v: boolean) => void;
   setUseLiveData: (v: boolean) => void;
@@ -28,28 +33,45 @@ export const useScreeningStore = create<ScreeningState>((set, get) => ({
   neutral: [],
   total: 0,
   timestamp: '',
+  shared: false,
   loading: false,
+  job: null,
   error: null,
   useMock: true,
   useLiveData: false,
   intradayInterval: 1,
   expandMode: 'none',
 
-  runScreening: async () => {
+  // fresh: an explicit refresh that must not reuse another run's recent snapshot
+  runScreening: async (fresh = false) => {
     const { useMock, useLiveData, intradayInterval } = get();
-    set({ loading: true, error: null });
+    set({ loading: true, job: null, error: null });
     try {
-      const data = await screeningApi.runScreening(useMock, useLiveData, intradayInterval);
+      // Submit a job and poll its progress instead of holding one request open
+      let job = await screeningApi.submitScreeningJob(useMock, useLiveData, intradayInterval, fresh);
+      set({ job });
+      while (job.status === 'queued' || job.status === 'running') {
+        await sleep(JOB_POLL_MS);
+        job = await screeningApi.getScreeningJob(job.job_id);
+        set({ job });
+      }
+      if (job.status === 'failed') {
+        set({ loading: false, job: null, error: job.error ?? 'Screening failed' });
+        return;
+      }
+      const data = await screeningApi.getScreeningJobResult(job.job_id);
       set({
         bullish: data.bullish,
         bearish: data.bearish,
         neutral: data.neutral,
         total: data.total,
         timestamp: data.timestamp,
+        shared: data.shared ?? false,
         loading: false,
+        job: null,
       });
     } catch (e) {
-      set({ loading: false, error: 'Screening failed' });
+      set({ loading: false, job: null, error: 'Screening failed' });
     }
   },
 
@@ -63,6 +85,7 @@ export const useScreeningStore = create<ScreeningState>((set, get) => ({
           neutral: data.neutral,
           total: data.total,
           timestamp: data.timestamp,
+          shared: data.shared ?? false,
         });
       }
     } catch {
@@ -45,6 +45,7 @@ export interface ScreeningResult {
   indicators: IndicatorData[];
   raw_data: Record<string, unknown>[];
   last_updated: string;
+  stale?: boolean;
 }
 
 export interface ScreeningResponse {
@@ -53,4 +54,25 @@ export interface ScreeningResponse {
   neutral: ScreeningResult[];
   total: number;
   timestamp: string;
+  stage_timings?: Record<string, number>;
+  mode?: string;
+  partial?: boolean;
+  timed_out?: string[];
+  as_of?: string | null;
+  version?: number | null;
+  shared?: boolean;
+}
+
+export interface ScreeningJobStatus {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  params: Record<string, unknown>;
+  submitted_at: string;
+  total: number;
+  done: number;
+  progress: number;
+  stage: string | null;
+  elapsed: number | null;
+  eta_seconds: number | null;
+  error: string | null;
 }